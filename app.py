@@ -1,28 +1,85 @@
+import asyncio
+import json
+import statistics
+import time
+import uuid
 from contextlib import asynccontextmanager
+from datetime import datetime
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional
+from typing import Optional, Tuple
 import psutil
 import os
-from dataclasses import asdict
+from dataclasses import asdict, replace
 from sqlalchemy.orm import Session
-from starlette.responses import HTMLResponse
+from starlette.responses import HTMLResponse, StreamingResponse
 from starlette.staticfiles import StaticFiles
 
-from core.db import get_db, PerformanceResult, init_db
-from core.performance_calculator import PerformanceCalculator
-from core.model import CalculationRequest
-from core.utils import CalculationResponse
+from core.control import RunControl, CalculationCancelled
+from core.db import (get_db, PerformanceResult, PerformanceTrial, PerformanceChunk, ResultRollup, ResultRollupBin,
+                     ResultWriter, ROLLUP_GRAINS, init_db, result_count)
+from core.executor import ExecutorTier, TierSaturated
+from core.export import EXPORT_FORMATS, export_results
+from core.jobs import Job, JobQueue, QueueFull
+from core.prefix_cache import PrefixSumIndex
+from core.result_cache import ResultCache, cache_key, RESULT_CACHE_RECORD_HITS
+from core.stream_buffers import StreamBuffers, WorkingSetUnavailable
+from core.stats import summarize, summarize_workers, fit_amdahl, fit_gustafson, histogram_percentile
+from core.worker_pool import WorkerPool, POOL_HEALTH_INTERVAL
+from core.performance_calculator import DEFAULT_WORKERS
+from core.model import CalculationRequest, CompareRequest, SweepRequest
+from core.registry import EngineContext, available_engines, get_engine, load_engines
+from core.workloads import WORKLOADS, get_workload
+from core.utils import CalculationResponse, PerformanceMetrics
 
 PORT = int(os.environ.get("PORT", 8080))
+# Seconds between progress events on the SSE stream
+PROGRESS_INTERVAL = float(os.environ.get("PROGRESS_INTERVAL", 0.5))
+# Seconds between checks for a /api/calculate client that went away
+DISCONNECT_POLL_INTERVAL = float(os.environ.get("DISCONNECT_POLL_INTERVAL", 0.5))
+
+async def monitor_worker_pool(pool: WorkerPool):
+    while True:
+        await asyncio.sleep(POOL_HEALTH_INTERVAL)
+        await asyncio.to_thread(pool.health_check)
+
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
     print("Starting lifespan")
     init_db()
+    load_engines()
+    _app.state.result_writer = ResultWriter()
+    _app.state.result_writer.start()
+    _app.state.executors = ExecutorTier()
+    _app.state.prefix_index = PrefixSumIndex()
+    _app.state.result_cache = ResultCache()
+    _app.state.stream_buffers = StreamBuffers()
+
+    _app.state.worker_pool = WorkerPool()
+    startup_time = await asyncio.to_thread(_app.state.worker_pool.start)
+    print(f"Worker pool started with {_app.state.worker_pool.num_workers} workers in {startup_time:.3f}s")
+    pool_monitor = asyncio.create_task(monitor_worker_pool(_app.state.worker_pool))
+    _app.state.engine_context = EngineContext(
+        worker_pool=_app.state.worker_pool, prefix_index=_app.state.prefix_index,
+        stream_buffers=_app.state.stream_buffers
+    )
+
+    _app.state.job_queue = JobQueue(process_job)
+    _app.state.job_queue.start()
+
     yield
 
+    await _app.state.job_queue.stop()
+    pool_monitor.cancel()
+    _app.state.worker_pool.shutdown()
+    _app.state.executors.shutdown()
+    _app.state.prefix_index.close()
+    _app.state.stream_buffers.close()
+    # Last, so rows from anything that finished during shutdown still get written
+    _app.state.result_writer.stop()
+
 
 app = FastAPI(title="Performance Comparison API", version="1.0.0", lifespan=lifespan)
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -37,101 +94,682 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.post("/api/calculate", response_model=CalculationResponse)
-async def calculate_performance(request: CalculationRequest, db: Session = Depends(get_db)):
+async def run_calculation(request: CalculationRequest, control: Optional[RunControl] = None) -> PerformanceMetrics:
+    try:
+        engine = get_engine(request.processing_mode)
+    except KeyError:
+        raise HTTPException(status_code=400, detail="Invalid processing mode")
+
+    workload = get_workload(request.workload)
+    context = app.state.engine_context
+    # Setting up a workload (e.g. filling a multi-GB working set) mustn't block the event loop
+    try:
+        workload_options = await asyncio.to_thread(workload.prepare, request, context) if workload.prepare else None
+    except WorkingSetUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    # Process-tier engines run in another process, where the app's shared resources don't exist
+    tier = engine.tier_for(workload)
+    try:
+        if tier == "thread":
+            engine_context = replace(context, workload_options=workload_options)
+        else:
+            engine_context = EngineContext(workload_options=workload_options)
+        metrics = await app.state.executors.run(tier, engine.fn, request, control, engine_context)
+    finally:
+        if workload.release:
+            workload.release(workload_options, context)
+
+    if "working_set" in workload.options:
+        metrics.working_set = request.working_set or workload.options["working_set"]
+    if workload.bytes_per_term and metrics.execution_time > 0:
+        terms = request.upper_bound - request.lower_bound + 1
+        metrics.bandwidth = terms * workload.bytes_per_term / metrics.execution_time / 1e9
+    return metrics
+
+
+async def run_trials(request: CalculationRequest, control: Optional[RunControl] = None) -> PerformanceMetrics:
+    """Run warmup + measured repetitions and return the median run, annotated with the whole distribution"""
+    if request.repetitions == 1 and request.warmup == 0:
+        return await run_calculation(request, control)
+
+    runs = [await run_calculation(request, control) for _ in range(request.warmup + request.repetitions)]
+    measured = runs[request.warmup:]
+
+    metrics = sorted(measured, key=lambda m: m.execution_time)[(len(measured) - 1) // 2]
+    metrics.trials = [
+        {
+            "trial_index": index,
+            "warmup": index < request.warmup,
+            "execution_time": run.execution_time,
+            "cpu_time": run.cpu_time,
+        }
+        for index, run in enumerate(runs)
+    ]
+    metrics.trial_stats = {
+        "repetitions": request.repetitions,
+        "warmup": request.warmup,
+        "execution_time": summarize(m.execution_time for m in measured),
+        "cpu_time": summarize(m.cpu_time for m in measured),
+    }
+    return metrics
+
+
+async def save_result(metrics: PerformanceMetrics) -> PerformanceResult:
+    """Queue the row on the result writer and wait for the batch commit that stores it"""
+    db_result = PerformanceResult(
+        status=metrics.status,
+        run_group=metrics.run_group,
+        timestamp=metrics.timestamp,
+        lower_bound=metrics.lower_bound,
+        upper_bound=metrics.upper_bound,
+        processing_mode=metrics.processing_mode,
+        workload=metrics.workload,
+        working_set=metrics.working_set,
+        bandwidth=metrics.bandwidth,
+        execution_time=metrics.execution_time,
+        cpu_time=metrics.cpu_time,
+        memory_usage=metrics.memory_usage,
+        cpu_utilization=metrics.cpu_utilization,
+        result_value=metrics.result_value,
+        cores_used=metrics.cores_used,
+        estimated_error=metrics.estimated_error,
+        cache_hits=metrics.cache_hits,
+        terms_computed=metrics.terms_computed,
+        cached=metrics.cached,
+        cpu_profile=json.dumps(metrics.cpu_profile) if metrics.cpu_profile else None,
+        trials=[PerformanceTrial(**trial) for trial in metrics.trials or []],
+        chunks=[PerformanceChunk(**chunk) for chunk in metrics.chunks or []]
+    )
+
+    return await asyncio.wrap_future(app.state.result_writer.submit(db_result))
+
+
+def validate_request(request: CalculationRequest):
     if request.upper_bound <= request.lower_bound:
         raise HTTPException(status_code=400, detail="Upper bound must be greater than lower bound")
 
-    if request.upper_bound - request.lower_bound > 10_000_000:
-        raise HTTPException(status_code=400, detail="Range too large. Maximum range is 10 million")
+    engine = get_engine(request.processing_mode)
+    if engine.max_range is not None and request.upper_bound - request.lower_bound > engine.max_range:
+        raise HTTPException(status_code=400, detail=f"Range too large. Maximum range is {engine.max_range:,}")
 
-    try:
-        calculator = PerformanceCalculator()
-
-        if request.processing_mode == "sequential":
-            metrics = calculator.calculate_sequential(request.lower_bound, request.upper_bound)
-        elif request.processing_mode == "threading":
-            metrics = calculator.calculate_threading(request.lower_bound, request.upper_bound)
-        elif request.processing_mode == "multiprocessing":
-            metrics = calculator.calculate_multiprocessing(request.lower_bound, request.upper_bound)
+    if not engine.supports(request.workload):
+        raise HTTPException(status_code=400,
+                            detail=f"The {engine.name} engine can't run the {request.workload} workload")
+    max_upper_bound = get_workload(request.workload).max_upper_bound
+    if max_upper_bound is not None and request.upper_bound > max_upper_bound:
+        raise HTTPException(status_code=400,
+                            detail=f"The {request.workload} workload needs an upper bound <= {max_upper_bound:,}")
+
+
+def cancelled_metrics(request: CalculationRequest, completed: int, elapsed: float) -> PerformanceMetrics:
+    """Metrics recorded for a cancelled run: partial progress, no result"""
+    return PerformanceMetrics(
+        timestamp=datetime.now().isoformat(),
+        lower_bound=request.lower_bound,
+        upper_bound=request.upper_bound,
+        processing_mode=request.processing_mode,
+        workload=request.workload,
+        execution_time=elapsed,
+        cpu_time=None,
+        memory_usage=None,
+        cpu_utilization=None,
+        result_value=None,
+        terms_computed=completed,
+        status="cancelled"
+    )
+
+
+async def calculate_and_record(request: CalculationRequest,
+                               control: Optional[RunControl] = None) -> Tuple[PerformanceMetrics, Optional[PerformanceResult]]:
+    """Serve from the result cache or run the engine, then store the PerformanceResult row.
+
+    A run cancelled through ``control`` is stored as a "cancelled" row carrying
+    the number of terms finished instead of a result.
+    """
+    result_cache: ResultCache = app.state.result_cache
+    # A cached value says nothing about timing distributions, so trial runs always compute
+    use_cache = not request.no_cache and request.repetitions == 1 and request.warmup == 0
+
+    key = cache_key(request)
+    metrics = result_cache.get(key) if use_cache else None
+
+    if metrics is None:
+        start_time = time.perf_counter()
+        try:
+            metrics = await run_trials(request, control)
+        except CalculationCancelled as e:
+            metrics = cancelled_metrics(request, e.completed, time.perf_counter() - start_time)
         else:
-            raise HTTPException(status_code=400, detail="Invalid processing mode")
-
-        db_result = PerformanceResult(
-            timestamp=metrics.timestamp,
-            lower_bound=metrics.lower_bound,
-            upper_bound=metrics.upper_bound,
-            processing_mode=metrics.processing_mode,
-            execution_time=metrics.execution_time,
-            cpu_time=metrics.cpu_time,
-            memory_usage=metrics.memory_usage,
-            cpu_utilization=metrics.cpu_utilization,
-            result_value=metrics.result_value,
-            cores_used=metrics.cores_used
-        )
+            if use_cache:
+                result_cache.put(key, metrics)
+
+    db_result = None
+    if not metrics.cached or RESULT_CACHE_RECORD_HITS:
+        db_result = await save_result(metrics)
+    return metrics, db_result
+
+
+async def process_job(job: Job) -> Tuple[PerformanceMetrics, Optional[int]]:
+    job.control = RunControl()
+    try:
+        metrics, db_result = await calculate_and_record(job.request, job.control)
+        return metrics, db_result.id if db_result else None
+    finally:
+        job.completed_terms = job.control.completed()
+        job.control.close()
+        job.control = None
+
+
+async def cancel_on_disconnect(http_request: Request, control: RunControl):
+    while not await http_request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+    print("Client disconnected, cancelling calculation")
+    control.cancel()
+
 
-        db.add(db_result)
-        db.commit()
-        db.refresh(db_result)
+@app.post("/api/calculate", response_model=CalculationResponse)
+async def calculate_performance(request: CalculationRequest, http_request: Request):
+    validate_request(request)
+
+    control = RunControl()
+    watcher = asyncio.create_task(cancel_on_disconnect(http_request, control))
+    try:
+        metrics, _ = await calculate_and_record(request, control)
+
+        if metrics.status == "cancelled":
+            # Nobody is left to read this; 499 is the conventional "client closed request"
+            raise HTTPException(status_code=499, detail="Calculation cancelled")
 
         return CalculationResponse(
             metrics=asdict(metrics),
             success=True,
-            message="Calculation completed successfully"
+            message="Returned cached result" if metrics.cached else "Calculation completed successfully"
         )
 
+    except HTTPException:
+        raise
+
+    except TierSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
     except Exception as e:
-        db.rollback()
         print("Exception occurred", e)
         raise HTTPException(status_code=500, detail=f"Calculation failed: {str(e)}")
 
+    finally:
+        watcher.cancel()
+        control.close()
+
+
+@app.post("/api/jobs", status_code=202)
+async def submit_job(request: CalculationRequest):
+    validate_request(request)
+
+    try:
+        job = app.state.job_queue.submit(request)
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return {"job_id": job.id, "status": job.status}
+
+
+@app.get("/api/jobs")
+async def get_job_stats():
+    return app.state.job_queue.stats()
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = app.state.job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.delete("/api/jobs/{job_id}", status_code=202)
+async def cancel_job(job_id: str):
+    job = app.state.job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not app.state.job_queue.cancel(job):
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    return {"job_id": job.id, "status": job.status}
+
+
+@app.get("/api/jobs/{job_id}/progress")
+async def stream_job_progress(job_id: str):
+    """Server-Sent Events stream of completed terms and live terms/second until the job finishes"""
+    job = app.state.job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        last_completed, last_time = 0, time.perf_counter()
+        while True:
+            progress = job.progress()
+            now = time.perf_counter()
+            progress["terms_per_second"] = (progress["completed"] - last_completed) / max(now - last_time, 1e-9)
+            last_completed, last_time = progress["completed"], now
+
+            if job.finished_at:
+                yield f"event: done\ndata: {json.dumps(job.to_dict())}\n\n"
+                return
+            yield f"data: {json.dumps(progress)}\n\n"
+            await asyncio.sleep(PROGRESS_INTERVAL)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.post("/api/compare")
+async def compare_engines(request: CompareRequest):
+    """Run several engines on one range in interleaved rounds and report speedup vs. sequential"""
+    # Sequential is the baseline, so it always runs (and the normal range cap applies)
+    names = request.engines or [
+        engine.name for engine in available_engines() if engine.supports(request.workload)
+    ]
+    engines = ["sequential"] + [e for e in dict.fromkeys(names) if e != "sequential"]
+    for engine in engines:
+        validate_request(CalculationRequest(
+            lower_bound=request.lower_bound, upper_bound=request.upper_bound, processing_mode=engine,
+            workload=request.workload, working_set=request.working_set
+        ))
+
+    run_group = uuid.uuid4().hex
+    samples = {engine: [] for engine in engines}
+
+    try:
+        for repetition in range(request.repetitions):
+            # Rotate the order every round so no engine always runs first (cold) or last
+            shift = repetition % len(engines)
+            for engine in engines[shift:] + engines[:shift]:
+                metrics = await run_calculation(CalculationRequest(
+                    lower_bound=request.lower_bound, upper_bound=request.upper_bound,
+                    processing_mode=engine, workload=request.workload, working_set=request.working_set,
+                    no_cache=True
+                ))
+                metrics.run_group = run_group
+                await save_result(metrics)
+                samples[engine].append(metrics)
+
+    except HTTPException:
+        raise
+
+    except TierSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    except Exception as e:
+        print("Exception occurred", e)
+        raise HTTPException(status_code=500, detail=f"Comparison failed: {str(e)}")
+
+    baseline = statistics.median(m.execution_time for m in samples["sequential"])
+    engines_summary = []
+    for engine, runs in samples.items():
+        median_time = statistics.median(m.execution_time for m in runs)
+        speedup = baseline / median_time if median_time > 0 else None
+        engines_summary.append({
+            "processing_mode": engine,
+            "runs": len(runs),
+            "median_execution_time": median_time,
+            "best_execution_time": min(m.execution_time for m in runs),
+            "median_cpu_time": statistics.median(m.cpu_time for m in runs),
+            "median_bandwidth": statistics.median(m.bandwidth for m in runs) if runs[0].bandwidth else None,
+            "cores_used": runs[0].cores_used,
+            "speedup": speedup,
+            "efficiency": speedup / runs[0].cores_used if speedup is not None else None,
+            "result_value": runs[-1].result_value,
+        })
+
+    return {
+        "run_group": run_group,
+        "lower_bound": request.lower_bound,
+        "upper_bound": request.upper_bound,
+        "repetitions": request.repetitions,
+        "workload": request.workload,
+        "baseline": "sequential",
+        "engines": engines_summary,
+    }
+
+
+@app.post("/api/sweep")
+async def sweep_workers(request: SweepRequest):
+    """Time an engine at 1..max_workers workers (per range size) and fit Amdahl's or Gustafson's law.
+
+    By default every point runs the same range (strong scaling), which is what
+    Amdahl's law models. With ``weak_scaling`` a point with n workers runs n
+    times the range, speedup is the scaled speedup n * T(1) / T(n), and
+    Gustafson's law is fitted instead.
+    """
+    worker_limit = get_engine(request.processing_mode).worker_limit
+    max_workers = request.max_workers or (
+        worker_limit(app.state.engine_context) if worker_limit else DEFAULT_WORKERS
+    )
+    range_sizes = request.range_sizes or [request.upper_bound - request.lower_bound + 1]
+    scale = max_workers if request.weak_scaling else 1
+    for size in range_sizes:
+        validate_request(CalculationRequest(
+            lower_bound=request.lower_bound, upper_bound=request.lower_bound + size * scale - 1,
+            processing_mode=request.processing_mode, workload=request.workload, working_set=request.working_set
+        ))
+
+    run_group = uuid.uuid4().hex
+    curves = []
+
+    try:
+        for size in range_sizes:
+            points = []
+            for num_workers in range(1, max_workers + 1):
+                terms = size * num_workers if request.weak_scaling else size
+                runs = []
+                for _ in range(request.repetitions):
+                    metrics = await run_calculation(CalculationRequest(
+                        lower_bound=request.lower_bound, upper_bound=request.lower_bound + terms - 1,
+                        processing_mode=request.processing_mode, num_workers=num_workers,
+                        scheduling=request.scheduling, workload=request.workload,
+                        working_set=request.working_set, no_cache=True
+                    ))
+                    metrics.run_group = run_group
+                    await save_result(metrics)
+                    runs.append(metrics)
+                points.append({
+                    "num_workers": num_workers,
+                    "range_size": terms,
+                    "cores_used": runs[0].cores_used,
+                    "median_execution_time": statistics.median(m.execution_time for m in runs),
+                })
+
+            baseline = points[0]["median_execution_time"]
+            for point in points:
+                # Weak scaling: one worker would have taken num_workers times the baseline for this point's range
+                work = point["num_workers"] if request.weak_scaling else 1
+                point["speedup"] = baseline * work / point["median_execution_time"] if point["median_execution_time"] > 0 else None
+                point["efficiency"] = point["speedup"] / point["cores_used"] if point["speedup"] is not None else None
+
+            measured = [(p["cores_used"], p["speedup"]) for p in points if p["speedup"] is not None]
+            # Each law only means something for the kind of scaling it models
+            amdahl = fit_amdahl(measured) if not request.weak_scaling else None
+            curves.append({
+                "range_size": size,
+                "points": points,
+                "amdahl_serial_fraction": amdahl,
+                "amdahl_max_speedup": 1 / amdahl if amdahl else None,
+                "gustafson_serial_fraction": fit_gustafson(measured) if request.weak_scaling else None,
+            })
+
+    except HTTPException:
+        raise
+
+    except TierSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    except Exception as e:
+        print("Exception occurred", e)
+        raise HTTPException(status_code=500, detail=f"Sweep failed: {str(e)}")
+
+    return {
+        "run_group": run_group,
+        "processing_mode": request.processing_mode,
+        "workload": request.workload,
+        "max_workers": max_workers,
+        "repetitions": request.repetitions,
+        "scaling": "weak" if request.weak_scaling else "strong",
+        "curves": curves,
+    }
+
+
+@app.get("/api/engines")
+async def list_engines():
+    """Registered engines with their capabilities and the request options they read"""
+    return {"engines": [engine.to_dict() for engine in available_engines()]}
+
+
+@app.get("/api/workloads")
+async def list_workloads():
+    """Registered workloads, and which engines can run each"""
+    return {
+        "workloads": [
+            {
+                **workload.to_dict(),
+                "engines": [engine.name for engine in available_engines() if engine.supports(workload.name)],
+            }
+            for workload in WORKLOADS.values()
+        ]
+    }
+
+
+@app.get("/api/cache")
+async def get_cache_stats():
+    return app.state.result_cache.stats()
+
+
+def result_to_dict(result: PerformanceResult) -> dict:
+    return {
+        "id": result.id,
+        "timestamp": result.timestamp,
+        "lower_bound": result.lower_bound,
+        "upper_bound": result.upper_bound,
+        "processing_mode": result.processing_mode,
+        "workload": result.workload,
+        "working_set": result.working_set,
+        "bandwidth": result.bandwidth,
+        "execution_time": result.execution_time,
+        "cpu_time": result.cpu_time,
+        "memory_usage": result.memory_usage,
+        "cpu_utilization": result.cpu_utilization,
+        "result_value": result.result_value,
+        "cores_used": result.cores_used,
+        "estimated_error": result.estimated_error,
+        "cache_hits": result.cache_hits,
+        "terms_computed": result.terms_computed,
+        "cached": result.cached,
+        "status": result.status,
+        "run_group": result.run_group
+    }
+
 
 @app.get("/api/results")
 async def get_historical_results(
         limit: Optional[int] = 100,
         offset: Optional[int] = 0,
+        before_id: Optional[int] = None,
+        after_id: Optional[int] = None,
         processing_mode: Optional[str] = None,
+        workload: Optional[str] = None,
+        run_group: Optional[str] = None,
         db: Session = Depends(get_db)
 ):
+    """Results newest first.
+
+    Page with ``before_id`` (older than that id, i.e. the next page) or
+    ``after_id`` (newer, the previous page); both walk the primary key index
+    so every page costs the same however deep it is. ``offset`` still works
+    but scans every row it skips.
+    """
     query = db.query(PerformanceResult)
 
     # Apply filter if processing_mode is specified
     if processing_mode:
         query = query.filter(PerformanceResult.processing_mode == processing_mode)
+    if workload:
+        query = query.filter(PerformanceResult.workload == workload)
+    if run_group:
+        query = query.filter(PerformanceResult.run_group == run_group)
 
-    # Get total count
-    total_count = query.count()
+    # Run groups are small and indexed; the other filters are covered by the counters
+    total_count = query.count() if run_group else result_count(db, processing_mode, workload)
 
     # Apply pagination and ordering
-    results = query.order_by(PerformanceResult.id.desc()).offset(offset).limit(limit).all()
+    if before_id is not None:
+        query = query.filter(PerformanceResult.id < before_id)
+    if after_id is not None:
+        # Walk up from after_id so the page starts right next to it, then flip to newest first
+        query = query.filter(PerformanceResult.id > after_id)
+        results = query.order_by(PerformanceResult.id.asc()).limit(limit).all()[::-1]
+    elif before_id is not None:
+        results = query.order_by(PerformanceResult.id.desc()).limit(limit).all()
+    else:
+        results = query.order_by(PerformanceResult.id.desc()).offset(offset).limit(limit).all()
 
     # Convert to dict format
-    results_data = [
-        {
-            "id": result.id,
-            "timestamp": result.timestamp,
-            "lower_bound": result.lower_bound,
-            "upper_bound": result.upper_bound,
-            "processing_mode": result.processing_mode,
-            "execution_time": result.execution_time,
-            "cpu_time": result.cpu_time,
-            "memory_usage": result.memory_usage,
-            "cpu_utilization": result.cpu_utilization,
-            "result_value": result.result_value,
-            "cores_used": result.cores_used
-        }
-        for result in results
-    ]
+    results_data = [result_to_dict(result) for result in results]
 
     return {
         "results": results_data,
         "total_count": total_count,
-        "offset": offset,
+        "offset": offset if before_id is None and after_id is None else None,
         "limit": limit,
-        "filter": {"processing_mode": processing_mode} if processing_mode else None
+        # Cursors for the neighbouring pages
+        "next_before_id": results[-1].id if results else None,
+        "prev_after_id": results[0].id if results else None,
+        "filter": {
+            key: value
+            for key, value in (("processing_mode", processing_mode), ("workload", workload), ("run_group", run_group))
+            if value
+        } or None
+    }
+
+
+# Declared before /api/results/{result_id} so "export" isn't taken for an id
+@app.get("/api/results/export")
+async def export_historical_results(
+        format: str = "csv",
+        processing_mode: Optional[str] = None,
+        workload: Optional[str] = None,
+        run_group: Optional[str] = None
+):
+    """Every matching result oldest first as CSV, NDJSON or Parquet, streamed in constant memory"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+
+    return StreamingResponse(
+        export_results(format, processing_mode=processing_mode, workload=workload, run_group=run_group),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="performance_results.{format}"'}
+    )
+
+
+@app.get("/api/results/{result_id}")
+async def get_result(result_id: int, db: Session = Depends(get_db)):
+    result = db.get(PerformanceResult, result_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Result not found")
+
+    measured = [trial for trial in result.trials if not trial.warmup]
+    chunks = [
+        {
+            "chunk_id": chunk.chunk_id,
+            "lower_bound": chunk.lower_bound,
+            "upper_bound": chunk.upper_bound,
+            "pid": chunk.pid,
+            "thread_id": chunk.thread_id,
+            "start": chunk.start,
+            "end": chunk.end,
+            "cpu_time": chunk.cpu_time,
+        }
+        for chunk in result.chunks
+    ]
+    return {
+        **result_to_dict(result),
+        "cpu_profile": json.loads(result.cpu_profile) if result.cpu_profile else None,
+        "chunks": chunks,
+        "worker_summary": summarize_workers(chunks),
+        "trials": [
+            {
+                "trial_index": trial.trial_index,
+                "warmup": trial.warmup,
+                "execution_time": trial.execution_time,
+                "cpu_time": trial.cpu_time,
+            }
+            for trial in result.trials
+        ],
+        "trial_stats": {
+            "execution_time": summarize(trial.execution_time for trial in measured),
+            "cpu_time": summarize(trial.cpu_time for trial in measured),
+        } if measured else None
     }
 
 
+@app.get("/api/stats")
+async def get_stats(
+        grain: str = "day",
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        processing_mode: Optional[str] = None,
+        workload: Optional[str] = None,
+        by_period: bool = False,
+        db: Session = Depends(get_db)
+):
+    """execution_time statistics per mode x workload x range-size bucket, from the rollup tables.
+
+    ``since``/``until`` are inclusive ISO timestamp prefixes compared at the
+    grain's resolution (e.g. "2024-05-01" or "2024-05-01T13"), and
+    ``by_period`` keeps one group per hour or day instead of merging the
+    window. The work depends on the number of periods and groups in the
+    window, not on how many results are stored. Percentiles come from
+    log-scale histograms and are accurate to about 5%.
+    """
+    if grain not in ROLLUP_GRAINS:
+        raise HTTPException(status_code=400, detail=f"grain must be one of {', '.join(ROLLUP_GRAINS)}")
+    length = ROLLUP_GRAINS[grain]
+
+    def window(query, table):
+        query = query.filter(table.grain == grain)
+        if since:
+            query = query.filter(table.period >= since[:length])
+        if until:
+            query = query.filter(table.period <= until[:length])
+        if processing_mode:
+            query = query.filter(table.processing_mode == processing_mode)
+        if workload:
+            query = query.filter(table.workload == workload)
+        return query
+
+    def group_key(row) -> tuple:
+        return (row.period if by_period else None, row.processing_mode, row.workload, row.range_bucket)
+
+    groups = {}
+    for rollup in window(db.query(ResultRollup), ResultRollup):
+        group = groups.setdefault(group_key(rollup), {
+            "count": 0, "total": 0.0, "squares": 0.0, "min": rollup.min_time, "max": rollup.max_time, "bins": {}
+        })
+        group["count"] += rollup.count
+        group["total"] += rollup.total_time
+        group["squares"] += rollup.total_time_squared
+        group["min"] = min(group["min"], rollup.min_time)
+        group["max"] = max(group["max"], rollup.max_time)
+    for rollup_bin in window(db.query(ResultRollupBin), ResultRollupBin):
+        bins = groups[group_key(rollup_bin)]["bins"]
+        bins[rollup_bin.bin] = bins.get(rollup_bin.bin, 0) + rollup_bin.count
+
+    stats = []
+    for (period, mode, workload_name, bucket), group in sorted(groups.items()):
+        count, mean = group["count"], group["total"] / group["count"]
+        variance = (group["squares"] - count * mean * mean) / (count - 1) if count > 1 else 0.0
+
+        def clamp(value):
+            return min(group["max"], max(group["min"], value))
+
+        stats.append({
+            **({"period": period} if by_period else {}),
+            "processing_mode": mode,
+            "workload": workload_name,
+            "range_bucket": bucket,
+            "range_size": [10 ** bucket, 10 ** (bucket + 1) - 1],
+            "count": count,
+            "execution_time": {
+                "mean": mean,
+                "min": group["min"],
+                "max": group["max"],
+                "stddev": max(0.0, variance) ** 0.5,
+                "p50": clamp(histogram_percentile(group["bins"], 50)),
+                "p90": clamp(histogram_percentile(group["bins"], 90)),
+                "p99": clamp(histogram_percentile(group["bins"], 99)),
+            },
+        })
+
+    return {"grain": grain, "since": since, "until": until, "stats": stats}
+
+
 @app.get("/api/system-info")
 async def get_system_info():
     return {
@@ -143,7 +781,11 @@ async def get_system_info():
         },
         "platform": {
             "platform": os.name
-        }
+        },
+        "worker_pool": app.state.worker_pool.stats(),
+        "executors": app.state.executors.stats(),
+        "stream_buffers": app.state.stream_buffers.stats(),
+        "result_writer": app.state.result_writer.stats()
     }
 
 
@@ -0,0 +1,135 @@
+"""Compare PerformanceResult inserts per second across SQLite write paths.
+
+Runs against throwaway database files, so no server is needed:
+
+    python benchmarks/db_insert_rate.py --rows 2000 --writers 8
+
+Three configurations insert the same rows from ``--writers`` threads:
+
+* ``baseline``: the old setup, default rollback journal with one
+  add/commit/refresh per row
+* ``wal``: WAL mode with the pragmas from core.db, still one commit per row
+* ``batched``: WAL plus the ResultWriter, which groups concurrent rows into
+  one transaction
+
+Each configuration runs once per ``--durability`` level it applies to.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import wait
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.db import Base, PerformanceResult, PerformanceTrial, ResultWriter, create_db_engine, SYNCHRONOUS  # noqa: E402
+
+
+def make_row(index: int) -> PerformanceResult:
+    return PerformanceResult(
+        timestamp=f"2024-01-01T00:00:{index % 60:02d}",
+        lower_bound=1,
+        upper_bound=1000 + index,
+        processing_mode="sequential",
+        workload="basel",
+        execution_time=0.01,
+        cpu_time=0.01,
+        memory_usage=1.0,
+        cpu_utilization=100.0,
+        result_value=1.64,
+        trials=[PerformanceTrial(trial_index=0, warmup=False, execution_time=0.01, cpu_time=0.01)],
+    )
+
+
+def run_threads(writers: int, rows: int, insert):
+    """Call insert(index) for every row from ``writers`` threads; returns elapsed seconds"""
+    per_writer = rows // writers
+
+    def worker(offset: int):
+        for index in range(offset, offset + per_writer):
+            insert(index)
+
+    threads = [threading.Thread(target=worker, args=(i * per_writer,)) for i in range(writers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, per_writer * writers
+
+
+def commit_per_row(db_engine, writers: int, rows: int):
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+    lock = threading.Lock()
+
+    def insert(index: int):
+        # SQLite allows one writer at a time; the lock stands in for the API's serialized commits
+        with lock, Session() as session:
+            row = make_row(index)
+            session.add(row)
+            session.commit()
+            session.refresh(row)
+
+    return run_threads(writers, rows, insert)
+
+
+def batched(db_engine, writers: int, rows: int, batch_size: int, batch_interval: float):
+    writer = ResultWriter(bind=db_engine, batch_size=batch_size, batch_interval=batch_interval)
+    writer.start()
+    try:
+        futures = []
+
+        def insert(index: int):
+            future = writer.submit(make_row(index))
+            futures.append(future)
+            future.result()  # Like the API, each caller waits for its row's commit
+
+        elapsed, count = run_threads(writers, rows, insert)
+        wait(futures)
+        return elapsed, count, writer.batches
+    finally:
+        writer.stop()
+
+
+def database(directory: str, name: str) -> str:
+    return "sqlite:///" + os.path.join(directory, f"{name}.db")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--batch-interval", type=float, default=5, help="milliseconds")
+    parser.add_argument("--durability", nargs="+", default=["full", "normal"], choices=list(SYNCHRONOUS))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        baseline = create_engine(database(directory, "baseline"), connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=baseline)
+        elapsed, count = commit_per_row(baseline, args.writers, args.rows)
+        print(f"{'baseline':>20}: {count / elapsed:10.0f} rows/s  ({count} rows in {elapsed:.3f}s)")
+        baseline.dispose()
+
+        for durability in args.durability:
+            wal = create_db_engine(database(directory, f"wal-{durability}"), durability)
+            Base.metadata.create_all(bind=wal)
+            elapsed, count = commit_per_row(wal, args.writers, args.rows)
+            print(f"{'wal/' + durability:>20}: {count / elapsed:10.0f} rows/s  ({count} rows in {elapsed:.3f}s)")
+            wal.dispose()
+
+            grouped = create_db_engine(database(directory, f"batched-{durability}"), durability)
+            Base.metadata.create_all(bind=grouped)
+            elapsed, count, batches = batched(grouped, args.writers, args.rows, args.batch_size, args.batch_interval)
+            print(f"{'batched/' + durability:>20}: {count / elapsed:10.0f} rows/s  "
+                  f"({count} rows in {elapsed:.3f}s, {batches} commits)")
+            grouped.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Check that exporting a large results table stays under a memory cap.
+
+Fills a throwaway database with ``--rows`` results, then streams the export
+in every format from a fresh child process, discarding the output:
+
+    python benchmarks/export_memory.py --rows 1000000 --cap-mb 128
+
+Each child reports its peak RSS above what it used before the export
+started, along with the bytes written. Most of a streamed export's peak is
+SQLite's page cache, which DB_CACHE_SIZE bounds (64 MiB by default), so it
+doesn't grow with the table. ``--baseline`` adds a run that loads every
+row through the ORM, for contrast. Exits with status 1 if any streamed
+format goes over ``--cap-mb``.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import psutil
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.db import Base, PerformanceResult, create_db_engine  # noqa: E402
+from core.export import export_results  # noqa: E402
+from core.measurement import RssSampler  # noqa: E402
+
+MODES = ("sequential", "threading", "multiprocessing", "vectorized")
+INSERT_BATCH = 50_000
+
+
+def populate(url: str, rows: int):
+    db_engine = create_db_engine(url)
+    Base.metadata.create_all(bind=db_engine)
+    start = time.perf_counter()
+    with db_engine.begin() as connection:
+        for offset in range(0, rows, INSERT_BATCH):
+            connection.execute(insert(PerformanceResult), [
+                {
+                    "timestamp": f"2024-01-01T00:{index // 60 % 60:02d}:{index % 60:02d}",
+                    "lower_bound": 1,
+                    "upper_bound": 1000 + index,
+                    "processing_mode": MODES[index % len(MODES)],
+                    "workload": "basel",
+                    "execution_time": 0.01 + index % 100 / 1000,
+                    "cpu_time": 0.01,
+                    "memory_usage": 1.5,
+                    "cpu_utilization": 99.5,
+                    "result_value": 1.6449,
+                    "cores_used": 1,
+                    "cached": False,
+                    "status": "completed",
+                    "run_group": f"group-{index // 20}",
+                }
+                for index in range(offset, min(rows, offset + INSERT_BATCH))
+            ])
+    db_engine.dispose()
+    print(f"Inserted {rows} rows in {time.perf_counter() - start:.1f}s")
+
+
+def child(url: str, export_format: str):
+    """Run one export in this process and print its memory use as JSON"""
+    db_engine = create_db_engine(url)
+    session_factory = sessionmaker(bind=db_engine)
+    # Sampled rather than ru_maxrss, which a child inherits from the parent across exec
+    sampler = RssSampler(psutil.Process())
+    sampler.start()
+    start = time.perf_counter()
+    written = 0
+    if export_format == "orm":
+        with session_factory() as session:
+            results = session.query(PerformanceResult).all()
+            written = len(results)
+    else:
+        for chunk in export_results(export_format, session_factory=session_factory):
+            written += len(chunk)
+    seconds = time.perf_counter() - start
+    sampler.stop()
+    print(json.dumps({
+        "written": written,
+        "seconds": seconds,
+        "peak_mb": (sampler.peak - sampler.baseline) / 1024 / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--cap-mb", type=float, default=128, help="allowed peak RSS growth per export")
+    parser.add_argument("--baseline", action="store_true", help="also load every row through the ORM")
+    parser.add_argument("--child", nargs=2, metavar=("URL", "FORMAT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    failed = False
+    with tempfile.TemporaryDirectory() as directory:
+        url = "sqlite:///" + os.path.join(directory, "export.db")
+        populate(url, args.rows)
+        for export_format in ["csv", "ndjson", "parquet"] + (["orm"] if args.baseline else []):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", url, export_format],
+                check=True, capture_output=True, text=True
+            ).stdout
+            report = json.loads(output.strip().splitlines()[-1])
+            over = export_format != "orm" and report["peak_mb"] > args.cap_mb
+            failed = failed or over
+            unit = "rows" if export_format == "orm" else "bytes"
+            print(f"{'OVER' if over else 'ok':>4}  {export_format:>8}: peak +{report['peak_mb']:.1f} MB, "
+                  f"{report['written']:,} {unit} in {report['seconds']:.1f}s")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
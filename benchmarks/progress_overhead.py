@@ -0,0 +1,48 @@
+"""Measure the cost of progress reporting in the summation loop.
+
+    python benchmarks/progress_overhead.py --upper-bound 5000000 --runs 5
+
+Times PerformanceCalculator.calculate_chunk with and without a RunControl
+attached (best of N, alternating so drift affects both equally) and prints
+the relative overhead, which should stay well under 2%.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.control import RunControl
+from core.performance_calculator import PerformanceCalculator
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--upper-bound", type=int, default=5_000_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    control = RunControl()
+    plain, reported = [], []
+    try:
+        for _ in range(args.runs):
+            plain.append(timed(PerformanceCalculator.calculate_chunk, 1, args.upper_bound))
+            reported.append(timed(PerformanceCalculator.calculate_chunk, 1, args.upper_bound, control))
+    finally:
+        control.close()
+
+    overhead = (min(reported) - min(plain)) / min(plain) * 100
+    print(f"without progress: {min(plain):.4f}s")
+    print(f"   with progress: {min(reported):.4f}s")
+    print(f"        overhead: {overhead:+.2f}%")
+
+
+if __name__ == "__main__":
+    main()
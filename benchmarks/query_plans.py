@@ -0,0 +1,122 @@
+"""Check that the hot results-table queries are planned as index lookups.
+
+Fills a throwaway database (or checks an existing, already migrated one)
+and runs EXPLAIN QUERY PLAN on the queries the API issues:
+
+    python benchmarks/query_plans.py --rows 50000
+    python benchmarks/query_plans.py --db performance_results.db
+
+Each query must search an index (or the primary key) and must not sort
+through a temporary B-tree. The one allowed scan is the unfiltered latest
+page, which walks the primary key backwards and stops at the limit. The
+script prints every plan and exits with status 1 if any query falls back
+to a full scan or a sort.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.db import Base, PerformanceResult, create_db_engine  # noqa: E402
+
+MODES = ("sequential", "threading", "multiprocessing", "vectorized", "analytic", "prefix_sum")
+WORKLOADS = ("basel", "harmonic", "primes", "stream")
+
+
+def hot_queries(session) -> dict:
+    """The /api/results and /api/results/{id} queries, as the endpoints build them, and whether a primary key scan is fine"""
+    results = session.query(PerformanceResult)
+    by_mode = results.filter(PerformanceResult.processing_mode == "vectorized")
+    by_workload = results.filter(PerformanceResult.workload == "stream")
+    by_group = results.filter(PerformanceResult.run_group == "group-7")
+    newest = PerformanceResult.id.desc()
+    return {
+        "latest page": (results.order_by(newest).limit(100), True),
+        "mode page": (by_mode.order_by(newest).limit(100), False),
+        "mode page before id": (by_mode.filter(PerformanceResult.id < 5000).order_by(newest).limit(100), False),
+        "mode page after id": (
+            by_mode.filter(PerformanceResult.id > 5000).order_by(PerformanceResult.id.asc()).limit(100), False
+        ),
+        "workload page": (by_workload.order_by(newest).limit(100), False),
+        "mode and workload page": (
+            by_mode.filter(PerformanceResult.workload == "basel").order_by(newest).limit(100), False
+        ),
+        "run group page": (by_group.order_by(newest).limit(100), False),
+        "run group count": (by_group.with_entities(PerformanceResult.id), False),
+        "result by id": (results.filter(PerformanceResult.id == 42), False),
+    }
+
+
+def explain(session, query) -> list:
+    statement = query.statement.compile(session.bind, compile_kwargs={"literal_binds": True})
+    return [row[-1] for row in session.execute(text(f"EXPLAIN QUERY PLAN {statement}"))]
+
+
+def problems(plan: list, allow_scan: bool) -> list:
+    found = []
+    for step in plan:
+        if step.startswith("SCAN") and "INDEX" not in step and not allow_scan:
+            found.append(f"full scan: {step}")
+        if "TEMP B-TREE" in step:
+            found.append(f"sort: {step}")
+    return found
+
+
+def populate(session_factory, rows: int):
+    start = time.perf_counter()
+    with session_factory() as session:
+        session.bulk_insert_mappings(PerformanceResult, [
+            {
+                "timestamp": f"2024-01-01T00:00:{index % 60:02d}",
+                "lower_bound": 1,
+                "upper_bound": 1000 + index,
+                "processing_mode": MODES[index % len(MODES)],
+                "workload": WORKLOADS[index % 7 % len(WORKLOADS)],
+                "run_group": f"group-{index // 20}",
+                "execution_time": 0.01,
+            }
+            for index in range(rows)
+        ])
+        session.commit()
+        session.execute(text("ANALYZE"))
+    print(f"Inserted {rows} rows in {time.perf_counter() - start:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000, help="rows in the throwaway database")
+    parser.add_argument("--db", help="existing database file to check instead")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.db or os.path.join(directory, "plans.db")
+        db_engine = create_db_engine("sqlite:///" + path)
+        session_factory = sessionmaker(bind=db_engine)
+        if not args.db:
+            Base.metadata.create_all(bind=db_engine)
+            populate(session_factory, args.rows)
+
+        failed = False
+        with session_factory() as session:
+            for name, (query, allow_scan) in hot_queries(session).items():
+                plan = explain(session, query)
+                issues = problems(plan, allow_scan)
+                failed = failed or bool(issues)
+                print(f"{'FAIL' if issues else 'ok':>4}  {name}")
+                for step in plan:
+                    print(f"        {step}")
+                for issue in issues:
+                    print(f"      ! {issue}")
+        db_engine.dispose()
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Compare the Manager list and shared memory result transports.
+
+    python benchmarks/result_transport.py --upper-bound 1000000 --runs 5
+
+Runs calculate_multiprocessing with each transport, both on a persistent
+WorkerPool and with per-call process spawning, and prints the best and mean
+wall time of each combination: execution_time plus pool_startup_time, so
+process spawning and channel setup (the Manager server) are both counted.
+"""
+import argparse
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.performance_calculator import PerformanceCalculator
+from core.worker_pool import WorkerPool
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lower-bound", type=int, default=1)
+    parser.add_argument("--upper-bound", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    pool = WorkerPool()
+    pool.start()
+    try:
+        for label, run_pool in (("pool", pool), ("spawn", None)):
+            for transport in ("manager", "shared_memory"):
+                times = [
+                    metrics.execution_time + metrics.pool_startup_time
+                    for metrics in (
+                        PerformanceCalculator.calculate_multiprocessing(
+                            args.lower_bound, args.upper_bound, pool=run_pool, transport=transport
+                        )
+                        for _ in range(args.runs)
+                    )
+                ]
+                print(f"{label:>5} {transport:>13}: best={min(times):.4f}s mean={statistics.mean(times):.4f}s")
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Measure /api/system-info latency while calculations are running.
+
+Start the server first (``python app.py``), then run:
+
+    python benchmarks/system_info_latency.py --url http://localhost:8080
+
+The script samples /api/system-info on an idle server, then again while
+background clients keep /api/calculate busy, and prints p50/p99 for both.
+With calculations offloaded from the event loop the two p99 values should
+stay in the same ballpark.
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.request
+
+
+def get(url: str) -> float:
+    start = time.perf_counter()
+    with urllib.request.urlopen(url) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def post(url: str, payload: dict):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request) as response:
+        response.read()
+
+
+def sample(url: str, count: int, interval: float) -> list:
+    latencies = []
+    for _ in range(count):
+        latencies.append(get(url))
+        time.sleep(interval)
+    return latencies
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(label: str, latencies: list):
+    print(
+        f"{label:>12}: n={len(latencies)} "
+        f"p50={percentile(latencies, 50) * 1000:.2f}ms "
+        f"p99={percentile(latencies, 99) * 1000:.2f}ms "
+        f"mean={statistics.mean(latencies) * 1000:.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.01)
+    parser.add_argument("--clients", type=int, default=2)
+    parser.add_argument("--upper-bound", type=int, default=10_000_000)
+    parser.add_argument("--mode", default="sequential")
+    args = parser.parse_args()
+
+    info_url = f"{args.url}/api/system-info"
+    report("idle", sample(info_url, args.samples, args.interval))
+
+    stop = threading.Event()
+    payload = {"lower_bound": 1, "upper_bound": args.upper_bound, "processing_mode": args.mode}
+
+    def load():
+        while not stop.is_set():
+            try:
+                post(f"{args.url}/api/calculate", payload)
+            except Exception as e:
+                print("calculation failed:", e)
+                time.sleep(0.5)
+
+    clients = [threading.Thread(target=load, daemon=True) for _ in range(args.clients)]
+    for client in clients:
+        client.start()
+    time.sleep(0.5)  # let the calculations get going
+
+    try:
+        report("under load", sample(info_url, args.samples, args.interval))
+    finally:
+        stop.set()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import math
+
+# B_2, B_4, ..., B_20 as used in the asymptotic expansion of the trigamma function
+BERNOULLI_EVEN = (
+    1 / 6, -1 / 30, 1 / 42, -1 / 30, 5 / 66,
+    -691 / 2730, 7 / 6, -3617 / 510, 43867 / 798, -174611 / 330,
+)
+# Ranges this short are cheaper (and exact to rounding) to sum directly
+DIRECT_SUM_LIMIT = 64
+
+
+def _inv_pow_diff(a: int, b: int, n: int) -> float:
+    """a**-n - b**-n for integers 0 < a < b, without cancellation when a and b are close"""
+    d = b - a  # exact, even beyond 2**53
+    if 2 * d > b:
+        # b is more than twice a, so there is nothing to cancel
+        return float(a) ** -n - float(b) ** -n
+    return float(a) ** -n * -math.expm1(n * math.log1p(-d / b))
+
+
+def _truncation_bound(a: int, terms: int) -> float:
+    """Magnitude of the first omitted term when ``terms`` Bernoulli terms are used at x = a"""
+    return abs(BERNOULLI_EVEN[terms]) / float(a) ** (2 * terms + 3)
+
+
+def _plan(a: int, tolerance: float):
+    """Fewest Bernoulli terms meeting ``tolerance`` at x = a, or None if the series can't get there"""
+    for terms in range(len(BERNOULLI_EVEN)):
+        if _truncation_bound(a, terms) <= tolerance:
+            return terms
+    return None
+
+
+def basel_range_sum(i: int, j: int, tolerance: float = 1e-15):
+    """sum_{k=i..j} 1/k**2 as trigamma(i) - trigamma(j + 1), in O(1) time.
+
+    Small k are summed directly until the Euler-Maclaurin (Bernoulli) tail
+    expansion of trigamma converges to within ``tolerance``; the rest of the
+    range is the difference of two expansions. Returns ``(value, error)`` where
+    ``error`` bounds the truncation error plus floating point rounding.
+    """
+    if j - i + 1 <= DIRECT_SUM_LIMIT:
+        value = math.fsum(1.0 / (k * k) for k in range(i, j + 1))
+        return value, 2 * math.ulp(value)
+
+    # Shift the start of the expansion up until it converges fast enough
+    a = i
+    terms = _plan(a, tolerance)
+    while terms is None:
+        a += 1
+        terms = _plan(a, tolerance)
+
+    head = math.fsum(1.0 / (k * k) for k in range(i, min(a, j + 1)))
+    if a > j:
+        return head, 2 * math.ulp(head)
+
+    b = j + 1
+    parts = [_inv_pow_diff(a, b, 1), 0.5 * _inv_pow_diff(a, b, 2)]
+    for k in range(terms):
+        parts.append(BERNOULLI_EVEN[k] * _inv_pow_diff(a, b, 2 * k + 3))
+
+    value = math.fsum([head] + parts)
+    # Both remainders share a sign, so their difference is bounded by the larger one (at a)
+    error = _truncation_bound(a, terms) + 8 * math.ulp(value)
+    return value, error
@@ -0,0 +1,71 @@
+import multiprocessing
+import struct
+from multiprocessing import shared_memory
+
+
+class SharedMemorySink:
+    """Picklable handle workers use to write partial sums into a shared float64 buffer.
+
+    Supports ``sink[chunk_id] = value`` like a Manager list proxy, but the value
+    is written straight into shared memory with no round trip to another process.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __setitem__(self, chunk_id: int, value: float):
+        shm = shared_memory.SharedMemory(name=self.name)
+        try:
+            struct.pack_into("d", shm.buf, chunk_id * 8, value)
+        finally:
+            shm.close()
+
+
+class ManagerChannel:
+    """Partial sums collected through a Manager list proxy (one IPC round trip per chunk)"""
+
+    def __init__(self, num_chunks: int):
+        self.num_chunks = num_chunks
+        self._manager = None
+        self.sink = None
+
+    def __enter__(self):
+        self._manager = multiprocessing.Manager()
+        self.sink = self._manager.list([0.0] * self.num_chunks)
+        return self
+
+    def collect(self) -> list:
+        return list(self.sink)
+
+    def __exit__(self, *exc):
+        self._manager.shutdown()
+
+
+class SharedMemoryChannel:
+    """Partial sums written by workers into a shared float64 array indexed by chunk id"""
+
+    def __init__(self, num_chunks: int):
+        self.num_chunks = num_chunks
+        self._shm = None
+        self.sink = None
+
+    def __enter__(self):
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, self.num_chunks) * 8)
+        struct.pack_into(f"{self.num_chunks}d", self._shm.buf, 0, *([0.0] * self.num_chunks))
+        self.sink = SharedMemorySink(self._shm.name)
+        return self
+
+    def collect(self) -> list:
+        return list(struct.unpack_from(f"{self.num_chunks}d", self._shm.buf, 0))
+
+    def __exit__(self, *exc):
+        self._shm.close()
+        self._shm.unlink()
+
+
+def open_channel(transport: str, num_chunks: int):
+    if transport == "manager":
+        return ManagerChannel(num_chunks)
+    if transport == "shared_memory":
+        return SharedMemoryChannel(num_chunks)
+    raise ValueError(f"Unknown result transport: {transport}")
@@ -0,0 +1,74 @@
+import os
+import struct
+from multiprocessing import shared_memory
+
+# Terms between progress reports; big enough that reporting costs well under 1%
+PROGRESS_BLOCK = int(os.environ.get("PROGRESS_BLOCK", 65_536))
+# Progress slots per run; every chunk of work writes its own slot
+CONTROL_SLOTS = 4096
+# Seconds a cancelled worker process gets to notice the flag before it is terminated
+CANCEL_GRACE = float(os.environ.get("CANCEL_GRACE", 1.0))
+
+
+class CalculationCancelled(Exception):
+    """Raised by an engine when its run was cancelled; carries the terms finished so far"""
+
+    def __init__(self, completed: int):
+        super().__init__(completed)
+        self.completed = completed
+
+
+class RunControl:
+    """Shared memory control block for one calculation run.
+
+    Starts with an int64 cancel flag followed by one int64 completed-term
+    counter per chunk, so threads and processes can report progress and see
+    cancellation without locks or IPC: each chunk only ever writes its own slot
+    and readers sum them. Pickling sends just the segment name, so the same
+    object can be handed to process pool workers, which attach lazily.
+    """
+
+    def __init__(self, slots: int = CONTROL_SLOTS):
+        self.slots = slots
+        self._shm = shared_memory.SharedMemory(create=True, size=(slots + 1) * 8)
+        self._shm.buf[:(slots + 1) * 8] = bytes((slots + 1) * 8)
+        self._owner = True
+        self.name = self._shm.name
+
+    def __getstate__(self):
+        return {"name": self.name, "slots": self.slots}
+
+    def __setstate__(self, state):
+        self.name = state["name"]
+        self.slots = state["slots"]
+        self._shm = None
+        self._owner = False
+
+    def _buffer(self):
+        if self._shm is None:
+            self._shm = shared_memory.SharedMemory(name=self.name)
+        return self._shm.buf
+
+    def report(self, slot: int, completed: int):
+        """Record that the chunk using ``slot`` has finished ``completed`` terms so far"""
+        struct.pack_into("q", self._buffer(), (slot % self.slots + 1) * 8, completed)
+
+    def completed(self) -> int:
+        return sum(struct.unpack_from(f"{self.slots}q", self._buffer(), 8))
+
+    def cancel(self):
+        struct.pack_into("q", self._buffer(), 0, 1)
+
+    def cancelled(self) -> bool:
+        return struct.unpack_from("q", self._buffer(), 0)[0] != 0
+
+    def raise_if_cancelled(self):
+        if self.cancelled():
+            raise CalculationCancelled(self.completed())
+
+    def close(self):
+        if self._shm is not None:
+            self._shm.close()
+            if self._owner:
+                self._shm.unlink()
+            self._shm = None
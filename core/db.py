@@ -1,16 +1,56 @@
-from sqlalchemy import create_engine, Column, Integer, Float, String, DateTime
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from sqlalchemy import create_engine, event, func, or_, Column, Index, Integer, Float, String, Text, DateTime, Boolean, ForeignKey, inspect, text
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, relationship, deferred
 from datetime import datetime
 
+from core.stats import histogram_bin
+
 # SQLite database URL
 SQLALCHEMY_DATABASE_URL = "sqlite:///./performance_results.db"
+# "full" fsyncs every commit; "normal" (WAL) can lose the last commits on power loss but never corrupts;
+# "off" leaves flushing to the OS
+DB_DURABILITY = os.environ.get("DB_DURABILITY", "normal")
+SYNCHRONOUS = {"full": "FULL", "normal": "NORMAL", "off": "OFF"}
+# Page cache per connection in KiB, and how long a writer waits for the lock before failing
+DB_CACHE_SIZE = int(os.environ.get("DB_CACHE_SIZE", 64 * 1024))
+DB_BUSY_TIMEOUT = int(os.environ.get("DB_BUSY_TIMEOUT", 5000))
+# The result writer commits once it has this many rows or the oldest has waited this many milliseconds
+DB_BATCH_SIZE = int(os.environ.get("DB_BATCH_SIZE", 200))
+DB_BATCH_INTERVAL = float(os.environ.get("DB_BATCH_INTERVAL", 5))
+
+
+def create_db_engine(url: str = SQLALCHEMY_DATABASE_URL, durability: str = DB_DURABILITY):
+    """SQLite engine whose connections run in WAL mode with the pragmas for ``durability``"""
+    if durability not in SYNCHRONOUS:
+        raise ValueError(f"Unknown durability {durability!r}; expected one of {', '.join(SYNCHRONOUS)}")
+    db_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False}  # Needed for SQLite
+    )
+
+    @event.listens_for(db_engine, "connect")
+    def set_pragmas(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        # Readers no longer block the writer and a commit appends to the log instead of rewriting pages
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={SYNCHRONOUS[durability]}")
+        cursor.execute(f"PRAGMA cache_size=-{DB_CACHE_SIZE}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT}")
+        cursor.close()
+
+    return db_engine
+
 
 # Create engine
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
-)
+engine = create_db_engine()
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -22,24 +62,347 @@ Base = declarative_base()
 # Database model
 class PerformanceResult(Base):
     __tablename__ = "performance_results"
+    # Built around the reads the API does: /api/results filters by one of these and pages by id,
+    # so each index serves both the filter and the order. Every other lookup is by primary key.
+    __table_args__ = (
+        Index("ix_performance_results_mode_id", "processing_mode", "id"),
+        Index("ix_performance_results_workload_id", "workload", "id"),
+        Index("ix_performance_results_run_group_id", "run_group", "id"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    timestamp = Column(String, index=True)
-    lower_bound = Column(Integer, index=True)
-    upper_bound = Column(Integer, index=True)
-    processing_mode = Column(String, index=True)
+    id = Column(Integer, primary_key=True)
+    timestamp = Column(String)
+    lower_bound = Column(Integer)
+    upper_bound = Column(Integer)
+    processing_mode = Column(String)
+    workload = Column(String, default="basel")
+    working_set = Column(Integer, nullable=True)
+    bandwidth = Column(Float, nullable=True)
     execution_time = Column(Float)
     cpu_time = Column(Float)
     memory_usage = Column(Float)
     cpu_utilization = Column(Float)
     result_value = Column(Float)
     cores_used = Column(Integer, default=1)
+    estimated_error = Column(Float, nullable=True)
+    cache_hits = Column(Integer, nullable=True)
+    terms_computed = Column(Integer, nullable=True)
+    cached = Column(Boolean, default=False)
+    status = Column(String, default="completed")
+    run_group = Column(String, nullable=True)
+    # JSON CPU utilization time series; only loaded when a single result is fetched
+    cpu_profile = deferred(Column(Text, nullable=True))
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Every timed run behind this row when the request asked for repetitions
+    trials = relationship("PerformanceTrial", back_populates="result", cascade="all, delete-orphan",
+                          order_by="PerformanceTrial.trial_index")
+    # Per-chunk worker timeline for the parallel engines
+    chunks = relationship("PerformanceChunk", back_populates="result", cascade="all, delete-orphan",
+                          order_by="PerformanceChunk.chunk_id")
+
     def __repr__(self):
         return f"<PerformanceResult(id={self.id}, mode={self.processing_mode}, time={self.execution_time})>"
 
 
+class PerformanceTrial(Base):
+    __tablename__ = "performance_trials"
+
+    id = Column(Integer, primary_key=True, index=True)
+    result_id = Column(Integer, ForeignKey("performance_results.id"), index=True)
+    trial_index = Column(Integer)
+    warmup = Column(Boolean, default=False)
+    execution_time = Column(Float)
+    cpu_time = Column(Float)
+
+    result = relationship("PerformanceResult", back_populates="trials")
+
+    def __repr__(self):
+        return f"<PerformanceTrial(result_id={self.result_id}, index={self.trial_index}, time={self.execution_time})>"
+
+
+class PerformanceChunk(Base):
+    __tablename__ = "performance_chunks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    result_id = Column(Integer, ForeignKey("performance_results.id"), index=True)
+    chunk_id = Column(Integer)
+    lower_bound = Column(Integer)
+    upper_bound = Column(Integer)
+    pid = Column(Integer)
+    thread_id = Column(Integer)
+    start = Column(Float)
+    end = Column(Float)
+    cpu_time = Column(Float)
+
+    result = relationship("PerformanceResult", back_populates="chunks")
+
+    def __repr__(self):
+        return f"<PerformanceChunk(result_id={self.result_id}, chunk={self.chunk_id}, pid={self.pid})>"
+
+
+class ResultCount(Base):
+    """Rows in performance_results per (processing_mode, workload), so totals don't need a table scan.
+
+    ResultWriter bumps these in the same transaction as the inserts, and
+    init_db rebuilds them if they've drifted (e.g. rows written by an older
+    version).
+    """
+    __tablename__ = "result_counts"
+
+    processing_mode = Column(String, primary_key=True)
+    workload = Column(String, primary_key=True)
+    count = Column(Integer, default=0)
+
+    def __repr__(self):
+        return f"<ResultCount(mode={self.processing_mode}, workload={self.workload}, count={self.count})>"
+
+
+class ResultRollup(Base):
+    """execution_time aggregates per period x mode x workload x range-size bucket, for /api/stats.
+
+    ``grain`` is "hour" or "day" and ``period`` the timestamp prefix it covers
+    (e.g. "2024-05-01T13" or "2024-05-01"); ``range_bucket`` is the decade of
+    the range size (3 means 1,000-9,999 terms). Only completed, computed
+    (not cache-served) runs are counted. Kept up to date like ResultCount.
+    """
+    __tablename__ = "result_rollups"
+
+    grain = Column(String, primary_key=True)
+    period = Column(String, primary_key=True)
+    processing_mode = Column(String, primary_key=True)
+    workload = Column(String, primary_key=True)
+    range_bucket = Column(Integer, primary_key=True)
+    count = Column(Integer, default=0)
+    total_time = Column(Float, default=0.0)
+    # Sum of squares, for the standard deviation
+    total_time_squared = Column(Float, default=0.0)
+    min_time = Column(Float)
+    max_time = Column(Float)
+
+    def __repr__(self):
+        return f"<ResultRollup({self.grain} {self.period}, mode={self.processing_mode}, count={self.count})>"
+
+
+class ResultRollupBin(Base):
+    """Log-scale execution_time histogram (see core.stats.histogram_bin) behind each ResultRollup, for percentiles"""
+    __tablename__ = "result_rollup_bins"
+
+    grain = Column(String, primary_key=True)
+    period = Column(String, primary_key=True)
+    processing_mode = Column(String, primary_key=True)
+    workload = Column(String, primary_key=True)
+    range_bucket = Column(Integer, primary_key=True)
+    bin = Column(Integer, primary_key=True)
+    count = Column(Integer, default=0)
+
+
+class ResultWriter(threading.Thread):
+    """Write-behind queue that inserts PerformanceResult rows in batched transactions.
+
+    ``submit`` hands a row (with its trials and chunks) to the writer thread
+    and returns a Future. The thread commits whatever has queued up once it
+    holds ``batch_size`` rows or the oldest has waited ``batch_interval``
+    milliseconds, so concurrent requests share one commit (and one fsync)
+    instead of taking turns on the write lock. Futures resolve with the
+    detached row after its batch commits, so callers still get the id. If a
+    batch fails its rows are retried one per transaction, and only the ones
+    that fail again get the exception.
+    """
+
+    def __init__(self, bind=None, batch_size: int = DB_BATCH_SIZE, batch_interval: float = DB_BATCH_INTERVAL):
+        super().__init__(name="result-writer", daemon=True)
+        self.session_factory = sessionmaker(autoflush=False, expire_on_commit=False, bind=bind or engine)
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval / 1000
+        self.rows_written = 0
+        self.batches = 0
+        self._queue = queue.Queue()
+
+    def submit(self, row: "PerformanceResult") -> Future:
+        future = Future()
+        self._queue.put((row, future))
+        return future
+
+    def run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.perf_counter() + self.batch_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._write(batch)
+                    return
+                batch.append(item)
+            self._write(batch)
+
+    def _write(self, batch: list):
+        with self.session_factory() as session:
+            try:
+                rows = [row for row, _ in batch]
+                session.add_all(rows)
+                bump_result_counts(session, rows)
+                bump_rollups(session, rows)
+                session.commit()
+            except Exception as e:
+                # Rolling back turns the rows transient again, so they can be retried on their own
+                session.rollback()
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                else:
+                    for item in batch:
+                        self._write([item])
+                return
+            session.expunge_all()
+        self.rows_written += len(batch)
+        self.batches += 1
+        for row, future in batch:
+            future.set_result(row)
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._queue.qsize(),
+            "rows_written": self.rows_written,
+            "batches": self.batches,
+            "batch_size": self.batch_size,
+            "batch_interval_ms": self.batch_interval * 1000,
+            "durability": DB_DURABILITY,
+        }
+
+    def stop(self):
+        """Flush everything submitted so far, then end the thread"""
+        self._queue.put(None)
+        self.join()
+
+
+def bump_result_counts(session, rows: list):
+    """Add ``rows`` (about to be inserted) to the per-mode counters within the session's transaction"""
+    counts = {}
+    for row in rows:
+        key = (row.processing_mode, row.workload)
+        counts[key] = counts.get(key, 0) + 1
+    for (processing_mode, workload), count in counts.items():
+        statement = insert(ResultCount).values(processing_mode=processing_mode, workload=workload, count=count)
+        session.execute(statement.on_conflict_do_update(
+            index_elements=["processing_mode", "workload"],
+            set_={"count": ResultCount.count + statement.excluded.count}
+        ))
+
+
+def result_count(session, processing_mode: str = None, workload: str = None) -> int:
+    """Total results matching the filters, from the counters"""
+    query = session.query(func.coalesce(func.sum(ResultCount.count), 0))
+    if processing_mode:
+        query = query.filter(ResultCount.processing_mode == processing_mode)
+    if workload:
+        query = query.filter(ResultCount.workload == workload)
+    return query.scalar()
+
+
+def sync_result_counts(rebuild: bool = False):
+    """Rebuild result_counts from performance_results if asked to or their totals disagree"""
+    with SessionLocal() as session:
+        if not rebuild and result_count(session) == session.query(func.count(PerformanceResult.id)).scalar():
+            return
+        print("Rebuilding result counts")
+        session.query(ResultCount).delete()
+        session.execute(text(
+            "INSERT INTO result_counts (processing_mode, workload, count) "
+            "SELECT processing_mode, workload, COUNT(*) FROM performance_results GROUP BY processing_mode, workload"
+        ))
+        session.commit()
+
+
+# Rollup grains and the length of the ISO timestamp prefix that names their period
+ROLLUP_GRAINS = {"hour": 13, "day": 10}
+
+
+def range_bucket(lower_bound: int, upper_bound: int) -> int:
+    """Decade of the range size: 0 for 1-9 terms, 1 for 10-99, ..."""
+    return len(str(max(1, upper_bound - lower_bound + 1))) - 1
+
+
+def rollup_deltas(rows) -> tuple:
+    """Rollup and histogram increments for ``rows``, keyed like ResultRollup and ResultRollupBin"""
+    groups, bins = {}, {}
+    for row in rows:
+        if row.status not in (None, "completed") or row.cached or row.execution_time is None:
+            continue
+        time_taken = row.execution_time
+        for grain, length in ROLLUP_GRAINS.items():
+            key = (grain, row.timestamp[:length], row.processing_mode, row.workload,
+                   range_bucket(row.lower_bound, row.upper_bound))
+            group = groups.get(key)
+            if group is None:
+                groups[key] = [1, time_taken, time_taken * time_taken, time_taken, time_taken]
+            else:
+                group[0] += 1
+                group[1] += time_taken
+                group[2] += time_taken * time_taken
+                group[3] = min(group[3], time_taken)
+                group[4] = max(group[4], time_taken)
+            bin_key = key + (histogram_bin(time_taken),)
+            bins[bin_key] = bins.get(bin_key, 0) + 1
+    return groups, bins
+
+
+def bump_rollups(session, rows: list):
+    """Fold ``rows`` (about to be inserted) into the rollups within the session's transaction"""
+    groups, bins = rollup_deltas(rows)
+    key_columns = ["grain", "period", "processing_mode", "workload", "range_bucket"]
+    for key, (count, total, squares, low, high) in groups.items():
+        statement = insert(ResultRollup).values(
+            **dict(zip(key_columns, key)), count=count, total_time=total, total_time_squared=squares,
+            min_time=low, max_time=high
+        )
+        excluded = statement.excluded
+        session.execute(statement.on_conflict_do_update(index_elements=key_columns, set_={
+            "count": ResultRollup.count + excluded.count,
+            "total_time": ResultRollup.total_time + excluded.total_time,
+            "total_time_squared": ResultRollup.total_time_squared + excluded.total_time_squared,
+            # Two-argument min/max are SQLite's scalar functions
+            "min_time": func.min(ResultRollup.min_time, excluded.min_time),
+            "max_time": func.max(ResultRollup.max_time, excluded.max_time),
+        }))
+    for key, count in bins.items():
+        statement = insert(ResultRollupBin).values(**dict(zip(key_columns + ["bin"], key)), count=count)
+        session.execute(statement.on_conflict_do_update(
+            index_elements=key_columns + ["bin"],
+            set_={"count": ResultRollupBin.count + statement.excluded.count}
+        ))
+
+
+def sync_result_rollups(rebuild: bool = False):
+    """Rebuild the rollups in one streaming pass over performance_results if asked to or they've drifted from it"""
+    with SessionLocal() as session:
+        rolled_up = session.query(func.coalesce(func.sum(ResultRollup.count), 0)).filter(
+            ResultRollup.grain == "day"
+        ).scalar()
+        eligible = session.query(func.count(PerformanceResult.id)).filter(
+            or_(PerformanceResult.status.is_(None), PerformanceResult.status == "completed"),
+            or_(PerformanceResult.cached.is_(None), PerformanceResult.cached.is_(False)),
+            PerformanceResult.execution_time.isnot(None),
+        ).scalar()
+        if not rebuild and rolled_up == eligible:
+            return
+        print("Rebuilding result rollups")
+        session.query(ResultRollupBin).delete()
+        session.query(ResultRollup).delete()
+        rows = session.query(
+            PerformanceResult.timestamp, PerformanceResult.processing_mode, PerformanceResult.workload,
+            PerformanceResult.lower_bound, PerformanceResult.upper_bound, PerformanceResult.execution_time,
+            PerformanceResult.status, PerformanceResult.cached
+        ).yield_per(10_000)
+        bump_rollups(session, rows)
+        session.commit()
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -48,7 +411,54 @@ def get_db():
         db.close()
 
 
+def add_missing_columns(bind=engine):
+    """create_all() never alters existing tables, so add columns (and their indexes) introduced since the file was created"""
+    inspector = inspect(bind)
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=bind.dialect)
+                    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+
+
+def drop_stale_indexes(bind=engine):
+    """Drop indexes on the model tables that the models no longer declare; each one costs every insert"""
+    inspector = inspect(bind)
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            declared = {index.name for index in table.indexes}
+            for index in inspector.get_indexes(table.name):
+                if index["name"] not in declared:
+                    print("Dropping index", index["name"])
+                    connection.execute(text(f"DROP INDEX {index['name']}"))
+
+
+def backfill_workloads(bind=engine) -> int:
+    """Rows from before the workload column were all Basel runs, but ADD COLUMN left them NULL; returns rows fixed"""
+    with bind.begin() as connection:
+        return connection.execute(
+            text("UPDATE performance_results SET workload = 'basel' WHERE workload IS NULL")
+        ).rowcount
+
+
 # Initialize database
 def init_db():
     print("Initializing database")
     Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    drop_stale_indexes()
+    # Counters and rollups built before the backfill filed those rows under no workload
+    backfilled = backfill_workloads()
+    sync_result_counts(rebuild=backfilled > 0)
+    sync_result_rollups(rebuild=backfilled > 0)
+    with engine.connect() as connection:
+        # Refreshes the planner's statistics where they've gone stale (e.g. after the index changes)
+        connection.execute(text("PRAGMA optimize"))
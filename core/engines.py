@@ -0,0 +1,77 @@
+# Built-in engines; each adapts a CalculationRequest to one PerformanceCalculator method
+from typing import Optional
+
+from core.control import RunControl
+from core.performance_calculator import PerformanceCalculator
+from core.registry import register_engine, EngineContext
+from core.utils import PerformanceMetrics
+
+PARALLEL_OPTIONS = {"num_workers": None, "scheduling": "guided"}
+
+
+@register_engine("sequential", label="Sequential", tier="process", cancellable=True)
+def run_sequential(request, control: Optional[RunControl] = None,
+                   context: Optional[EngineContext] = None) -> PerformanceMetrics:
+    """Plain Python loop in a single thread; the baseline for speedups"""
+    return PerformanceCalculator.calculate_sequential(
+        request.lower_bound, request.upper_bound, control, probes=request.probes, workload=request.workload,
+        workload_options=context.workload_options
+    )
+
+
+# Holds the GIL, so it runs in the process tier like sequential
+@register_engine("threading", label="Multithreading", tier="process", parallel=True, cancellable=True,
+                 options=PARALLEL_OPTIONS)
+def run_threading(request, control: Optional[RunControl] = None,
+                  context: Optional[EngineContext] = None) -> PerformanceMetrics:
+    """Chunks summed by a thread pool; shows what the GIL does to CPU-bound threads"""
+    return PerformanceCalculator.calculate_threading(
+        request.lower_bound, request.upper_bound, control, request.num_workers, request.scheduling,
+        probes=request.probes, workload=request.workload,
+        workload_options=context.workload_options
+    )
+
+
+# Mostly waits on its children, so it can stay in a thread
+@register_engine("multiprocessing", label="Multiprocessing", tier="thread", parallel=True, cancellable=True,
+                 options={**PARALLEL_OPTIONS, "transport": "shared_memory"},
+                 worker_limit=lambda context: context.worker_pool.num_workers)
+def run_multiprocessing(request, control: Optional[RunControl] = None,
+                        context: Optional[EngineContext] = None) -> PerformanceMetrics:
+    """Chunks summed by the persistent worker process pool"""
+    return PerformanceCalculator.calculate_multiprocessing(
+        request.lower_bound, request.upper_bound, pool=context.worker_pool, transport=request.transport,
+        control=control, num_workers=request.num_workers, scheduling=request.scheduling, probes=request.probes, workload=request.workload,
+        workload_options=context.workload_options
+    )
+
+
+# NumPy releases the GIL inside its array kernels; the scalar fallback doesn't, so it goes to the process tier
+@register_engine("vectorized", label="Vectorized (NumPy)", tier="thread", scalar_tier="process", cancellable=True)
+def run_vectorized(request, control: Optional[RunControl] = None,
+                   context: Optional[EngineContext] = None) -> PerformanceMetrics:
+    """NumPy blocks of reciprocal squares"""
+    return PerformanceCalculator.calculate_vectorized(
+        request.lower_bound, request.upper_bound, control, probes=request.probes, workload=request.workload,
+        workload_options=context.workload_options
+    )
+
+
+@register_engine("analytic", label="Analytic (trigamma)", tier="thread", max_range=None,
+                 options={"error_tolerance": 1e-15}, workloads=("basel",))
+def run_analytic(request, control: Optional[RunControl] = None,
+                 context: Optional[EngineContext] = None) -> PerformanceMetrics:
+    """Closed form via trigamma tail expansions; constant time in the range size"""
+    return PerformanceCalculator.calculate_analytic(
+        request.lower_bound, request.upper_bound, request.error_tolerance, probes=request.probes
+    )
+
+
+# Shares one memory-mapped index, so it has to stay in this process
+@register_engine("prefix_sum", label="Prefix-Sum Cache", tier="thread", workloads=("basel",))
+def run_prefix_sum(request, control: Optional[RunControl] = None,
+                   context: Optional[EngineContext] = None) -> PerformanceMetrics:
+    """Two checkpoint lookups in a persistent prefix-sum index plus a short fix-up"""
+    return PerformanceCalculator.calculate_prefix_sum(
+        request.lower_bound, request.upper_bound, context.prefix_index, probes=request.probes
+    )
@@ -0,0 +1,83 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from multiprocessing import resource_tracker
+
+THREAD_TIER_WORKERS = int(os.environ.get("THREAD_TIER_WORKERS", 4))
+PROCESS_TIER_WORKERS = int(os.environ.get("PROCESS_TIER_WORKERS", 2))
+# Calculations allowed to wait for a worker before new ones are rejected
+TIER_QUEUE_LIMIT = int(os.environ.get("TIER_QUEUE_LIMIT", 16))
+
+
+class TierSaturated(Exception):
+    """Raised when an executor tier already has too many calculations pending"""
+
+
+class ExecutorTier:
+    """Bounded executors that keep calculations off the asyncio event loop.
+
+    The "thread" tier is for engines that spend their time waiting with the
+    GIL released (e.g. joining child processes); the "process" tier is for
+    engines that hold the GIL while computing and would otherwise starve the loop.
+    If a process-tier worker dies, the broken executor is replaced and the
+    calculation retried once, like WorkerPool.health_check does for its pool.
+    """
+
+    def __init__(self, thread_workers: int = THREAD_TIER_WORKERS,
+                 process_workers: int = PROCESS_TIER_WORKERS,
+                 queue_limit: int = TIER_QUEUE_LIMIT):
+        # Share one resource tracker with the workers so shared memory they attach to isn't reaped
+        resource_tracker.ensure_running()
+        self.executors = {
+            "thread": ThreadPoolExecutor(max_workers=thread_workers, thread_name_prefix="calc"),
+            "process": ProcessPoolExecutor(max_workers=process_workers),
+        }
+        self.limits = {
+            "thread": thread_workers + queue_limit,
+            "process": process_workers + queue_limit,
+        }
+        self.pending = {"thread": 0, "process": 0}
+        self.restarts = 0
+        self.process_workers = process_workers
+
+    async def run(self, tier: str, fn, *args, **kwargs):
+        if tier not in self.executors:
+            raise ValueError(f"Unknown executor tier: {tier}")
+
+        if self.pending[tier] >= self.limits[tier]:
+            raise TierSaturated(f"The {tier} tier is busy, try again later")
+
+        self.pending[tier] += 1
+        try:
+            loop = asyncio.get_running_loop()
+            for attempt in range(2):
+                executor = self.executors[tier]
+                try:
+                    return await loop.run_in_executor(executor, partial(fn, *args, **kwargs))
+                except BrokenProcessPool:
+                    self._replace(tier, executor)
+                    if attempt:
+                        raise
+        finally:
+            self.pending[tier] -= 1
+
+    def _replace(self, tier: str, broken):
+        # Every calculation that was on the broken executor ends up here; only the first replaces it
+        if self.executors[tier] is not broken:
+            return
+        print(f"The {tier} tier's process pool is broken, restarting it")
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.executors[tier] = ProcessPoolExecutor(max_workers=self.process_workers)
+        self.restarts += 1
+
+    def stats(self) -> dict:
+        return {
+            **{tier: {"pending": self.pending[tier], "limit": self.limits[tier]} for tier in self.executors},
+            "restarts": self.restarts,
+        }
+
+    def shutdown(self):
+        for executor in self.executors.values():
+            executor.shutdown(wait=True, cancel_futures=True)
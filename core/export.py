@@ -0,0 +1,125 @@
+import csv
+import io
+import json
+import os
+from typing import Iterator, Optional
+
+import pyarrow
+import pyarrow.parquet
+from sqlalchemy import select, Boolean, DateTime, Float, Integer
+
+from core.db import PerformanceResult, SessionLocal
+
+# Rows fetched from the cursor (and encoded, or written as one Parquet row group) at a time
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", 5000))
+# Every column but the CPU profile, which is a large JSON blob per row
+EXPORT_COLUMNS = [column for column in PerformanceResult.__table__.columns if column.name != "cpu_profile"]
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def export_chunks(session, processing_mode: Optional[str] = None, workload: Optional[str] = None,
+                  run_group: Optional[str] = None) -> Iterator[list]:
+    """Matching results oldest first, as lists of at most EXPORT_CHUNK_SIZE rows read off one cursor"""
+    statement = select(*EXPORT_COLUMNS).order_by(PerformanceResult.id)
+    if processing_mode:
+        statement = statement.where(PerformanceResult.processing_mode == processing_mode)
+    if workload:
+        statement = statement.where(PerformanceResult.workload == workload)
+    if run_group:
+        statement = statement.where(PerformanceResult.run_group == run_group)
+    # yield_per keeps only one chunk of rows in memory; the rest stays behind the cursor
+    result = session.execute(statement.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+    yield from result.partitions()
+
+
+def csv_stream(chunks: Iterator[list]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.name for column in EXPORT_COLUMNS])
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def ndjson_stream(chunks: Iterator[list]) -> Iterator[bytes]:
+    names = [column.name for column in EXPORT_COLUMNS]
+    for rows in chunks:
+        yield "".join(
+            json.dumps(dict(zip(names, row)), default=lambda value: value.isoformat()) + "\n" for row in rows
+        ).encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file handing back whatever was written since the last drain()"""
+
+    def __init__(self):
+        super().__init__()
+        self._parts = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def arrow_type(column):
+    if isinstance(column.type, Boolean):
+        return pyarrow.bool_()
+    if isinstance(column.type, Integer):
+        return pyarrow.int64()
+    if isinstance(column.type, Float):
+        return pyarrow.float64()
+    if isinstance(column.type, DateTime):
+        return pyarrow.timestamp("us")
+    return pyarrow.string()
+
+
+def arrow_schema():
+    return pyarrow.schema([(column.name, arrow_type(column)) for column in EXPORT_COLUMNS])
+
+
+def parquet_stream(chunks: Iterator[list]) -> Iterator[bytes]:
+    """One row group per chunk, sent as soon as it's encoded; the footer goes out last"""
+    schema = arrow_schema()
+    sink = _ChunkSink()
+    with pyarrow.parquet.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            writer.write_table(pyarrow.Table.from_arrays(
+                [pyarrow.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+            ))
+            yield sink.drain()
+    yield sink.drain()
+
+
+STREAMS = {"csv": csv_stream, "ndjson": ndjson_stream, "parquet": parquet_stream}
+
+
+def export_results(export_format: str, session_factory=SessionLocal, **filters) -> Iterator[bytes]:
+    """Encoded export of the matching results in ``export_format``, streamed chunk by chunk.
+
+    The generator owns its session, so it can outlive the request handler
+    that creates it (the response streams after the handler returns).
+    """
+    with session_factory() as session:
+        yield from STREAMS[export_format](export_chunks(session, **filters))
@@ -0,0 +1,191 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field, asdict
+from typing import Optional
+
+from core.control import RunControl
+from core.model import CalculationRequest
+from core.utils import PerformanceMetrics
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+JOB_QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", 100))
+# Finished jobs kept around for polling before the oldest are forgotten
+JOB_RETENTION = int(os.environ.get("JOB_RETENTION", 1000))
+
+
+class QueueFull(Exception):
+    """Raised when the job queue has no room for another job"""
+
+
+@dataclass
+class Job:
+    id: str
+    request: CalculationRequest
+    status: str = "queued"  # queued | running | completed | cancelled | failed
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    metrics: Optional[PerformanceMetrics] = None
+    result_id: Optional[int] = None
+    error: Optional[str] = None
+    # Live progress block while running; completed_terms is frozen from it when the job ends
+    control: Optional[RunControl] = None
+    completed_terms: int = 0
+
+    @property
+    def wait_time(self) -> Optional[float]:
+        return self.started_at - self.submitted_at if self.started_at else None
+
+    @property
+    def total_terms(self) -> int:
+        return self.request.upper_bound - self.request.lower_bound + 1
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "cancelled", "failed")
+
+    def progress(self) -> dict:
+        control = self.control
+        if self.status == "completed":
+            completed = self.total_terms
+        elif control is not None:
+            completed = control.completed()
+        else:
+            completed = self.completed_terms
+        return {
+            "id": self.id,
+            "status": self.status,
+            "completed": completed,
+            "total": self.total_terms,
+            "elapsed": time.time() - self.started_at if self.started_at else 0.0,
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "request": self.request.model_dump(),
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "wait_time": self.wait_time,
+            "metrics": asdict(self.metrics) if self.metrics else None,
+            "result_id": self.result_id,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """Bounded queue of calculation jobs drained by a fixed number of asyncio workers.
+
+    ``handler`` is an async callable taking a Job and returning
+    ``(metrics, result_id)``; it does the actual calculation and persistence.
+    """
+
+    def __init__(self, handler, num_workers: int = JOB_WORKERS, max_size: int = JOB_QUEUE_SIZE,
+                 retention: int = JOB_RETENTION):
+        self.handler = handler
+        self.num_workers = num_workers
+        self.retention = retention
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+        self._queue = asyncio.Queue(maxsize=max_size)
+        self._jobs = OrderedDict()
+        self._workers = []
+        self._running = 0
+        self._wait_times = deque(maxlen=1000)
+        self._run_times = deque(maxlen=1000)
+
+    def start(self):
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.num_workers)]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    def submit(self, request: CalculationRequest) -> Job:
+        job = Job(id=uuid.uuid4().hex, request=request)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFull(f"Job queue is full ({self._queue.maxsize} jobs waiting)")
+
+        self._jobs[job.id] = job
+        self._forget_finished()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job: Job) -> bool:
+        """Ask a job to stop; False if it had already finished.
+
+        Queued jobs are dropped without running. Running jobs get their cancel
+        flag set and finish as "cancelled" once the engine notices it.
+        """
+        if job.finished:
+            return False
+        if job.status == "queued":
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            self.cancelled += 1
+        elif job.control is not None:
+            job.control.cancel()
+        return True
+
+    def _forget_finished(self):
+        while len(self._jobs) > self.retention:
+            oldest = next((job_id for job_id, job in self._jobs.items() if job.finished_at), None)
+            if oldest is None:
+                break
+            del self._jobs[oldest]
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            if job.status == "cancelled":
+                self._queue.task_done()
+                continue
+
+            job.status = "running"
+            job.started_at = time.time()
+            self._wait_times.append(job.wait_time)
+            self._running += 1
+            try:
+                job.metrics, job.result_id = await self.handler(job)
+                job.status = job.metrics.status
+                if job.status == "cancelled":
+                    self.cancelled += 1
+                else:
+                    self.completed += 1
+            except Exception as e:
+                print("Job failed", job.id, e)
+                job.status = "failed"
+                job.error = str(e)
+                self.failed += 1
+            finally:
+                job.finished_at = time.time()
+                self._run_times.append(job.finished_at - job.started_at)
+                self._running -= 1
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        waits = list(self._wait_times)
+        runs = list(self._run_times)
+        return {
+            "workers": self.num_workers,
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "running": self._running,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "failed": self.failed,
+            "mean_wait_time": sum(waits) / len(waits) if waits else 0.0,
+            "max_wait_time": max(waits) if waits else 0.0,
+            "mean_run_time": sum(runs) / len(runs) if runs else 0.0,
+        }
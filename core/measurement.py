@@ -0,0 +1,314 @@
+import os
+import threading
+import time
+import tracemalloc
+from functools import lru_cache
+from typing import Optional, Sequence
+
+import psutil
+
+PROBES = ("timing", "rss", "cpu", "tracemalloc")
+# Probes used when a request doesn't list any; timing is always on
+DEFAULT_PROBES = tuple(os.environ.get("MEASUREMENT_PROBES", "timing,rss,cpu").split(","))
+# Seconds between process-tree RSS samples
+RSS_SAMPLE_INTERVAL = float(os.environ.get("RSS_SAMPLE_INTERVAL", 0.02))
+# Seconds between CPU samples; below ~0.05 the kernel's tick accounting makes them noisy
+CPU_SAMPLE_INTERVAL = float(os.environ.get("CPU_SAMPLE_INTERVAL", 0.1))
+# Most points kept in a CPU time series; longer runs are averaged down to this
+CPU_SERIES_LIMIT = int(os.environ.get("CPU_SERIES_LIMIT", 300))
+# Terms in the loop used to calibrate tracemalloc's slowdown
+CALIBRATION_TERMS = 20_000
+
+
+def _calibration_loop() -> int:
+    start = time.perf_counter_ns()
+    result = 0.0
+    for k in range(1, CALIBRATION_TERMS + 1):
+        result += 1.0 / (k * k)
+    return time.perf_counter_ns() - start
+
+
+@lru_cache(maxsize=None)
+def tracemalloc_slowdown() -> float:
+    """How many times slower a float-allocating Python loop runs under tracemalloc, measured once per process"""
+    plain = min(_calibration_loop() for _ in range(3))
+    tracemalloc.start()
+    try:
+        traced = min(_calibration_loop() for _ in range(3))
+    finally:
+        tracemalloc.stop()
+    return max(1.0, traced / max(plain, 1))
+
+
+def tree_rss(process: psutil.Process) -> int:
+    """Resident set size of a process and all of its live descendants, in bytes"""
+    total = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            pass  # Exited between listing and sampling
+    return total
+
+
+def tree_cpu_times(process: psutil.Process) -> dict:
+    """User + system CPU seconds of a process and each live descendant, by pid"""
+    times = {}
+    for proc in [process] + process.children(recursive=True):
+        try:
+            cpu = proc.cpu_times()
+            times[proc.pid] = cpu.user + cpu.system
+        except psutil.Error:
+            pass
+    return times
+
+
+def downsample(series: list, limit: int) -> list:
+    """Average consecutive points so at most ``limit`` remain"""
+    if len(series) <= limit:
+        return series
+    size = -(-len(series) // limit)
+    merged = []
+    for start in range(0, len(series), size):
+        bucket = series[start:start + size]
+        merged.append({
+            "t": bucket[-1]["t"],
+            "process": sum(point["process"] for point in bucket) / len(bucket),
+            "cores": [sum(core) / len(bucket) for core in zip(*(point["cores"] for point in bucket))],
+        })
+    return merged
+
+
+class RssSampler(threading.Thread):
+    """Background thread that tracks peak RSS of the process tree and the CPU time it spends doing so"""
+
+    def __init__(self, process: psutil.Process, interval: float = RSS_SAMPLE_INTERVAL):
+        super().__init__(name="rss-sampler", daemon=True)
+        self.process = process
+        self.interval = interval
+        self.baseline = tree_rss(process)
+        self.peak = self.baseline
+        self.samples = 1
+        self.cpu_time = 0.0
+        self._stop_event = threading.Event()
+
+    def sample(self):
+        self.peak = max(self.peak, tree_rss(self.process))
+        self.samples += 1
+
+    def run(self):
+        start = time.thread_time_ns()
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+        self.cpu_time = (time.thread_time_ns() - start) / 1e9
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        # Catch whatever the run left behind if it was shorter than one interval
+        self.sample()
+
+
+class CpuSampler(threading.Thread):
+    """Background thread recording per-core and process-tree CPU utilization over time.
+
+    Each point covers the time since the previous one: ``cores`` is the busy
+    percentage of every logical CPU (system wide) and ``process`` the CPU used
+    by this process and its children, in percent of one core, so it can reach
+    100 x cores. Children that exit between two samples lose their last slice.
+    CPU times advance in whole clock ticks, so the slice left over at stop()
+    is folded into the last full point and kept out of the peaks; a run with
+    no full interval gets no profile statistics at all.
+    """
+
+    def __init__(self, process: psutil.Process, interval: float = CPU_SAMPLE_INTERVAL):
+        super().__init__(name="cpu-sampler", daemon=True)
+        self.process = process
+        self.interval = interval
+        self.series = []
+        self.cpu_time = 0.0
+        # The slice between the last full interval and stop()
+        self._tail = None
+        self._stop_event = threading.Event()
+        self._start = time.perf_counter()
+        self._last_time = self._start
+        self._last_cores = psutil.cpu_times(percpu=True)
+        self._last_tree = tree_cpu_times(process)
+
+    def sample(self):
+        point = self._measure()
+        if point is not None:
+            self.series.append(point)
+
+    def _measure(self) -> Optional[dict]:
+        """The point covering the time since the previous one, or None if no time has passed"""
+        now = time.perf_counter()
+        cores = psutil.cpu_times(percpu=True)
+        tree = tree_cpu_times(self.process)
+        wall = now - self._last_time
+        if wall <= 0:
+            return None
+
+        core_busy = []
+        for before, after in zip(self._last_cores, cores):
+            total = sum(after) - sum(before)
+            idle = (after.idle + getattr(after, "iowait", 0.0)) - (before.idle + getattr(before, "iowait", 0.0))
+            core_busy.append(100 * (total - idle) / total if total > 0 else 0.0)
+        # A pid seen for the first time was born during this interval, so all of its time counts
+        process_time = sum(seconds - self._last_tree.get(pid, 0.0) for pid, seconds in tree.items())
+
+        self._last_time, self._last_cores, self._last_tree = now, cores, tree
+        return {
+            "t": now - self._start,
+            "process": max(0.0, 100 * process_time / wall),
+            "cores": core_busy,
+        }
+
+    def run(self):
+        start = time.thread_time_ns()
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+        self.cpu_time = (time.thread_time_ns() - start) / 1e9
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self._tail = self._measure()
+
+    def profile(self) -> dict:
+        """Time series plus average and peak utilization, per core and for the process tree"""
+        full = self.series
+        if not full:
+            return {"interval": self.interval, "series": []}
+
+        series = list(full)
+        if self._tail is not None:
+            series[-1] = self._fold(series, self._tail)
+
+        # Weight each point by how long it covers so the folded final point doesn't skew the average
+        spans = [point["t"] - previous for point, previous in zip(series, [0.0] + [p["t"] for p in series])]
+        elapsed = sum(spans) or 1.0
+        per_core = list(zip(*(point["cores"] for point in series)))
+        return {
+            "interval": self.interval,
+            "average": sum(p["process"] * span for p, span in zip(series, spans)) / elapsed,
+            "peak": max(p["process"] for p in full),
+            "per_core_average": [sum(c * span for c, span in zip(core, spans)) / elapsed for core in per_core],
+            "per_core_peak": [max(core) for core in zip(*(point["cores"] for point in full))],
+            "series": downsample(series, CPU_SERIES_LIMIT),
+        }
+
+    @staticmethod
+    def _fold(series: list, tail: dict) -> dict:
+        """The last point of ``series`` extended over ``tail``, averaged by the time each covers"""
+        last = series[-1]
+        last_span = last["t"] - (series[-2]["t"] if len(series) > 1 else 0.0)
+        tail_span = tail["t"] - last["t"]
+        total = last_span + tail_span
+        return {
+            "t": tail["t"],
+            "process": (last["process"] * last_span + tail["process"] * tail_span) / total,
+            "cores": [(a * last_span + b * tail_span) / total for a, b in zip(last["cores"], tail["cores"])],
+        }
+
+
+class Measurement:
+    """Context manager that times one engine run with the requested probes.
+
+    ``timing`` (wall clock, CPU time and utilization) is always active. ``rss``
+    samples resident memory across the process tree from a background thread,
+    so multiprocessing children are included. ``tracemalloc`` traces Python
+    allocations in this process only and slows allocation-heavy loops, so it
+    is opt-in. ``cpu`` records a per-core and process-tree utilization time
+    series; with it, ``cpu_utilization`` is the tree's time-weighted average.
+    ``results()`` gives PerformanceMetrics fields including the active probes
+    and the seconds each one cost: CPU time of the sampler threads, and for
+    tracemalloc an upper bound from its calibrated slowdown
+    (exact for the pure-Python engines, pessimistic for NumPy and the lookups).
+    """
+
+    def __init__(self, probes: Optional[Sequence[str]] = None):
+        requested = set(probes or DEFAULT_PROBES)
+        unknown = requested - set(PROBES)
+        if unknown:
+            raise ValueError(f"Unknown measurement probes: {', '.join(sorted(unknown))}")
+        self.probes = [probe for probe in PROBES if probe == "timing" or probe in requested]
+        self.process = psutil.Process()
+        self._sampler = None
+        self._cpu_sampler = None
+        self._tracemalloc_time = 0
+        self._slowdown = 1.0
+        self._results = {}
+
+    def __enter__(self):
+        if "rss" in self.probes:
+            self._sampler = RssSampler(self.process)
+            self._sampler.start()
+        if "cpu" in self.probes:
+            self._cpu_sampler = CpuSampler(self.process)
+            self._cpu_sampler.start()
+        if "tracemalloc" in self.probes:
+            self._slowdown = tracemalloc_slowdown()
+            probe_start = time.perf_counter_ns()
+            tracemalloc.start()
+            self._tracemalloc_time += time.perf_counter_ns() - probe_start
+
+        self.start_time = time.perf_counter_ns()
+        self.start_cpu_time = time.process_time_ns()
+        self.cpu_percent_start = self.process.cpu_percent()
+        return self
+
+    def elapsed(self) -> float:
+        """Seconds since the clock started"""
+        return (time.perf_counter_ns() - self.start_time) / 1e9
+
+    def __exit__(self, exc_type, exc, tb):
+        end_time = time.perf_counter_ns()
+        end_cpu_time = time.process_time_ns()
+        execution_time = (end_time - self.start_time) / 1e9
+
+        peak_memory = None
+        if "tracemalloc" in self.probes:
+            probe_start = time.perf_counter_ns()
+            current, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self._tracemalloc_time += time.perf_counter_ns() - probe_start
+
+        probe_overhead = {}
+        peak_rss = None
+        if self._sampler is not None:
+            self._sampler.stop()
+            peak_rss = self._sampler.peak
+            probe_overhead["rss"] = self._sampler.cpu_time
+            if peak_memory is None:
+                peak_memory = peak_rss - self._sampler.baseline
+        if "tracemalloc" in self.probes:
+            traced_time = execution_time * (1 - 1 / self._slowdown)
+            probe_overhead["tracemalloc"] = self._tracemalloc_time / 1e9 + traced_time
+
+        cpu_percent_end = self.process.cpu_percent()
+        cpu_utilization = max(self.cpu_percent_start, cpu_percent_end)
+        cpu_profile = None
+        if self._cpu_sampler is not None:
+            self._cpu_sampler.stop()
+            probe_overhead["cpu"] = self._cpu_sampler.cpu_time
+            cpu_profile = self._cpu_sampler.profile()
+            # Shorter than one sample interval: whole-run CPU time is steadier than one tick-rounded slice
+            cpu_utilization = cpu_profile.get(
+                "average", 100 * (end_cpu_time - self.start_cpu_time) / max(end_time - self.start_time, 1)
+            )
+
+        self._results = {
+            "execution_time": execution_time,
+            "cpu_time": (end_cpu_time - self.start_cpu_time) / 1e9,
+            "memory_usage": peak_memory / 1024 / 1024 if peak_memory is not None else None,  # Convert to MB
+            "cpu_utilization": cpu_utilization,
+            "cpu_profile": cpu_profile,
+            "peak_rss": peak_rss / 1024 / 1024 if peak_rss is not None else None,
+            "probes": self.probes,
+            "probe_overhead": probe_overhead,
+        }
+        return False
+
+    def results(self) -> dict:
+        return dict(self._results)
@@ -1,7 +1,86 @@
-from pydantic import BaseModel, Field
+from typing import Annotated, List, Optional
+
+from pydantic import AfterValidator, BaseModel, Field
+
+from core.measurement import PROBES
+from core.registry import engine_names, get_engine
+from core.scheduling import SCHEDULING_POLICIES
+from core.stream_buffers import STREAM_BUFFER_LIMIT
+from core.workloads import WORKLOADS
+
+INT64_MAX = 2 ** 63 - 1
+SCHEDULING_PATTERN = f"^({'|'.join(SCHEDULING_POLICIES)})$"
+PROBE_PATTERN = f"^({'|'.join(PROBES)})$"
+
+
+def registered_engine(name: str) -> str:
+    if name not in engine_names():
+        raise ValueError(f"Unknown processing mode '{name}'; available: {', '.join(engine_names())}")
+    return name
+
+
+def parallel_engine(name: str) -> str:
+    if not get_engine(registered_engine(name)).parallel:
+        raise ValueError(f"Processing mode '{name}' doesn't use multiple workers")
+    return name
+
+
+def registered_workload(name: str) -> str:
+    if name not in WORKLOADS:
+        raise ValueError(f"Unknown workload '{name}'; available: {', '.join(WORKLOADS)}")
+    return name
+
+
+EngineName = Annotated[str, AfterValidator(registered_engine)]
+WorkloadName = Annotated[str, AfterValidator(registered_workload)]
+ParallelEngineName = Annotated[str, AfterValidator(parallel_engine)]
 
 
 class CalculationRequest(BaseModel):
-    lower_bound: int = Field(..., ge=1, description="Lower bound (i) must be >= 1")
-    upper_bound: int = Field(..., description="Upper bound (j)")
-    processing_mode: str = Field(..., pattern="^(sequential|threading|multiprocessing)$")
\ No newline at end of file
+    lower_bound: int = Field(..., ge=1, le=INT64_MAX, description="Lower bound (i) must be >= 1")
+    upper_bound: int = Field(..., le=INT64_MAX, description="Upper bound (j)")
+    processing_mode: EngineName = Field(..., description="A registered engine (see /api/engines)")
+    workload: WorkloadName = Field("basel", description="Kernel summed over the range (see /api/workloads)")
+    working_set: Optional[int] = Field(None, ge=1024, le=STREAM_BUFFER_LIMIT,
+                                       description="Bytes the stream workload reads over (default 32 MiB)")
+    transport: str = Field("shared_memory", pattern="^(manager|shared_memory)$",
+                           description="How multiprocessing workers return partial sums")
+    error_tolerance: float = Field(1e-15, ge=1e-18, le=1.0,
+                                   description="Absolute error bound for the analytic engine")
+    no_cache: bool = Field(False, description="Always recompute and leave the result cache untouched")
+    repetitions: int = Field(1, ge=1, le=50, description="Measured runs; more than one bypasses the result cache")
+    warmup: int = Field(0, ge=0, le=10, description="Extra runs before the measured ones, discarded from the stats")
+    num_workers: Optional[int] = Field(None, ge=1, le=64,
+                                       description="Threads/processes for the parallel engines (default: cores, max 8)")
+    scheduling: str = Field("guided", pattern=SCHEDULING_PATTERN,
+                            description="How the parallel engines chunk the range: static shares or guided self-scheduling")
+    probes: Optional[List[Annotated[str, Field(pattern=PROBE_PATTERN)]]] = Field(
+        None, description="Measurement probes (timing, rss, cpu, tracemalloc); defaults to timing, rss and cpu"
+    )
+
+
+class CompareRequest(BaseModel):
+    lower_bound: int = Field(..., ge=1, le=INT64_MAX, description="Lower bound (i) must be >= 1")
+    upper_bound: int = Field(..., le=INT64_MAX, description="Upper bound (j)")
+    engines: Optional[List[EngineName]] = Field(
+        None, description="Modes to compare; defaults to every engine that supports the workload"
+    )
+    workload: WorkloadName = "basel"
+    working_set: Optional[int] = Field(None, ge=1024, le=STREAM_BUFFER_LIMIT)
+    repetitions: int = Field(3, ge=1, le=20, description="Interleaved rounds over all engines")
+
+
+class SweepRequest(BaseModel):
+    lower_bound: int = Field(..., ge=1, le=INT64_MAX, description="Lower bound (i) must be >= 1")
+    upper_bound: int = Field(..., le=INT64_MAX, description="Upper bound (j) for the default range size")
+    processing_mode: ParallelEngineName = "multiprocessing"
+    max_workers: Optional[int] = Field(None, ge=1, le=64, description="Sweep 1..max_workers (default: cores)")
+    range_sizes: Optional[List[Annotated[int, Field(ge=2)]]] = Field(
+        None, description="Terms per run, each starting at lower_bound; defaults to upper_bound - lower_bound + 1"
+    )
+    scheduling: str = Field("guided", pattern=SCHEDULING_PATTERN)
+    workload: WorkloadName = "basel"
+    working_set: Optional[int] = Field(None, ge=1024, le=STREAM_BUFFER_LIMIT)
+    repetitions: int = Field(3, ge=1, le=10, description="Runs per point; the median is used")
+    weak_scaling: bool = Field(False, description="Give n workers n times each range size (weak scaling) "
+                                                  "instead of the same size (strong scaling)")
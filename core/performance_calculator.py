@@ -1,174 +1,386 @@
 import multiprocessing
 import os
+import threading
 import time
 import tracemalloc
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
+from typing import Optional, Sequence
 
-import psutil
-
+from core.analytic import basel_range_sum
+from core.channels import open_channel
+from core.control import RunControl, PROGRESS_BLOCK, CANCEL_GRACE
+from core.measurement import Measurement
+from core.prefix_cache import PrefixSumIndex
+from core.scheduling import make_chunks
+from core.stream_buffers import prune_attachments
 from core.utils import PerformanceMetrics
+from core.workloads import get_workload
+from core.worker_pool import WorkerPool
+
+# Workers used by the parallel engines when the request doesn't pick a count
+DEFAULT_WORKERS = min(os.cpu_count(), 8)
+# Terms per NumPy block; keeps the vectorized engine's working memory at ~2 MB
+VECTOR_BLOCK_SIZE = int(os.environ.get("VECTOR_BLOCK_SIZE", 262_144))
+# Values in a chunk's timing span: pid, native thread id, start/end perf_counter_ns, thread CPU ns
+SPAN_FIELDS = 5
 
 
 class PerformanceCalculator:
     """High-performance calculator with different processing paradigms"""
 
     @staticmethod
-    def calculate_chunk(start: int, end: int) -> float:
+    def calculate_chunk(start: int, end: int, control: Optional[RunControl] = None, slot: int = 0,
+                        workload: str = "basel", workload_options: Optional[dict] = None) -> float:
+        spec = get_workload(workload)
+        kernel = spec.scalar
+        options = workload_options or {}
+        prune_attachments()
+        if control is None:
+            return kernel(start, end, **options)
+
+        # Report progress and check for cancellation once per block
+        block_size = max(PROGRESS_BLOCK, spec.min_block(end)) if spec.min_block else PROGRESS_BLOCK
         result = 0.0
-        for k in range(start, end + 1):
-            result += 1.0 / (k * k)
+        for block_start in range(start, end + 1, block_size):
+            block_end = min(block_start + block_size - 1, end)
+            result += kernel(block_start, block_end, **options)
+            control.report(slot, block_end - start + 1)
+            if control.cancelled():
+                break
         return result
 
     @staticmethod
-    def calculate_sequential(i: int, j: int) -> PerformanceMetrics:
-        """Sequential processing implementation"""
-        process = psutil.Process()
+    def timed_chunk(start: int, end: int, control: Optional[RunControl] = None, slot: int = 0,
+                    workload: str = "basel", workload_options: Optional[dict] = None) -> tuple:
+        """calculate_chunk plus the span of the worker that ran it.
 
-        # Start monitoring
-        tracemalloc.start()
-        start_time = time.time()
-        start_cpu_time = time.process_time()
-        cpu_percent_start = process.cpu_percent()
+        perf_counter is system wide on the platforms we run on, so spans from
+        different processes share one timeline.
+        """
+        started = time.perf_counter_ns()
+        started_cpu = time.thread_time_ns()
+        partial = PerformanceCalculator.calculate_chunk(start, end, control, slot, workload, workload_options)
+        span = (os.getpid(), threading.get_native_id(), started, time.perf_counter_ns(),
+                time.thread_time_ns() - started_cpu)
+        return partial, span
 
-        # Perform calculation
-        result = 0.0
-        for k in range(i, j + 1):
-            result += 1.0 / (k * k)
+    @staticmethod
+    def chunk_records(chunks: list, spans: list, origin: int) -> list:
+        """Per-chunk worker records, with times in seconds since ``origin`` (perf_counter_ns); unrun chunks are left out"""
+        return [
+            {
+                "chunk_id": chunk_id,
+                "lower_bound": chunk_start,
+                "upper_bound": chunk_end,
+                "pid": span[0],
+                "thread_id": span[1],
+                "start": (span[2] - origin) / 1e9,
+                "end": (span[3] - origin) / 1e9,
+                "cpu_time": span[4] / 1e9,
+            }
+            for chunk_id, ((chunk_start, chunk_end), span) in enumerate(zip(chunks, spans))
+            if span is not None
+        ]
 
-        # End monitoring
-        end_time = time.time()
-        end_cpu_time = time.process_time()
-        current, peak_memory = tracemalloc.get_traced_memory()
-        tracemalloc.stop()
+    @staticmethod
+    def calculate_chunk_vectorized(start: int, end: int, block_size: int = VECTOR_BLOCK_SIZE,
+                                   control: Optional[RunControl] = None, slot: int = 0,
+                                   workload: str = "basel", workload_options: Optional[dict] = None) -> float:
+        spec = get_workload(workload)
+        options = workload_options or {}
+        prune_attachments()
+        # Workloads without a NumPy kernel still run, just block by block in Python
+        kernel = spec.vector or spec.scalar
+        if spec.min_block:
+            block_size = max(block_size, spec.min_block(end))
+        result = 0.0
+        for block_start in range(start, end + 1, block_size):
+            block_end = min(block_start + block_size - 1, end)
+            result += kernel(block_start, block_end, **options)
+            if control is not None:
+                control.report(slot, block_end - start + 1)
+                if control.cancelled():
+                    break
+        return result
 
-        # Get CPU utilization
-        cpu_percent_end = process.cpu_percent()
-        cpu_utilization = max(cpu_percent_start, cpu_percent_end)
+    @staticmethod
+    def calculate_sequential(i: int, j: int, control: Optional[RunControl] = None,
+                             probes: Optional[Sequence[str]] = None, workload: str = "basel",
+                             workload_options: Optional[dict] = None) -> PerformanceMetrics:
+        """Sequential processing implementation"""
+        with Measurement(probes) as measurement:
+            result = PerformanceCalculator.calculate_chunk(i, j, control, workload=workload,
+                                                           workload_options=workload_options)
+            if control is not None:
+                control.raise_if_cancelled()
 
         return PerformanceMetrics(
             timestamp=datetime.now().isoformat(),
             lower_bound=i,
             upper_bound=j,
             processing_mode="sequential",
-            execution_time=end_time - start_time,
-            cpu_time=end_cpu_time - start_cpu_time,
-            memory_usage=peak_memory / 1024 / 1024,  # Convert to MB
-            cpu_utilization=cpu_utilization,
+            workload=workload,
             result_value=result,
-            cores_used=1
+            cores_used=1,
+            **measurement.results()
         )
 
     @staticmethod
-    def calculate_threading(i: int, j: int) -> PerformanceMetrics:
-        """Multithreading implementation"""
-        process = psutil.Process()
-        num_threads = min(os.cpu_count(), 8)  # Limit threads
+    def calculate_threading(i: int, j: int, control: Optional[RunControl] = None,
+                            num_workers: Optional[int] = None, scheduling: str = "guided",
+                            probes: Optional[Sequence[str]] = None, workload: str = "basel",
+                            workload_options: Optional[dict] = None) -> PerformanceMetrics:
+        """Multithreading implementation; idle threads pull the next chunk from the executor queue"""
+        num_threads = num_workers or DEFAULT_WORKERS
 
-        # Start monitoring
-        tracemalloc.start()
-        start_time = time.time()
-        start_cpu_time = time.process_time()
-        cpu_percent_start = process.cpu_percent()
+        def worker(start: int, end: int, slot: int) -> tuple:
+            if control is not None and control.cancelled():
+                return 0.0, None
+            return PerformanceCalculator.timed_chunk(start, end, control, slot, workload, workload_options)
 
-        # Calculate chunk size
-        total_range = j - i + 1
-        chunk_size = max(1, total_range // num_threads)
+        with Measurement(probes) as measurement:
+            chunks = make_chunks(scheduling, i, j, num_threads)
 
-        def worker(start: int, end: int) -> float:
-            return PerformanceCalculator.calculate_chunk(start, end)
+            result = 0.0
+            spans = []
+            with ThreadPoolExecutor(max_workers=num_threads) as executor:
+                futures = [
+                    executor.submit(worker, chunk_start, chunk_end, chunk_id)
+                    for chunk_id, (chunk_start, chunk_end) in enumerate(chunks)
+                ]
+                for future in futures:
+                    partial, span = future.result()
+                    result += partial
+                    spans.append(span)
 
-        result = 0.0
-        with ThreadPoolExecutor(max_workers=num_threads) as executor:
-            futures = []
-            for t in range(num_threads):
-                chunk_start = i + t * chunk_size
-                chunk_end = min(chunk_start + chunk_size - 1, j)
-                if chunk_start <= j:
-                    futures.append(executor.submit(worker, chunk_start, chunk_end))
+            if control is not None:
+                control.raise_if_cancelled()
+
+        return PerformanceMetrics(
+            timestamp=datetime.now().isoformat(),
+            lower_bound=i,
+            upper_bound=j,
+            processing_mode="threading",
+            workload=workload,
+            result_value=result,
+            cores_used=num_threads,
+            scheduling=scheduling,
+            chunks=PerformanceCalculator.chunk_records(chunks, spans, measurement.start_time),
+            **measurement.results()
+        )
+
+    @staticmethod
+    def cpu_bound_task(start, end, chunk_id, result_sink, control=None, workload="basel", workload_options=None):
+        """Sum one chunk into ``result_sink`` and return its span, or None if the run was already cancelled"""
+        if control is not None and control.cancelled():
+            return None
+        partial, span = PerformanceCalculator.timed_chunk(start, end, control, chunk_id, workload, workload_options)
+        result_sink[chunk_id] = partial
+        return span
+
+    @staticmethod
+    def drain_chunks(chunks, next_chunk, result_sink, spans, control=None, workload="basel", workload_options=None):
+        """Worker process loop: claim chunk indices from the shared counter until none are left.
+
+        Spans go into the flat shared ``spans`` array, SPAN_FIELDS values per chunk.
+        """
+        # A forked child inherits the parent's tracing but its allocations are never reported
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        while True:
+            with next_chunk.get_lock():
+                chunk_id = next_chunk.value
+                next_chunk.value += 1
+            if chunk_id >= len(chunks):
+                return
+            chunk_start, chunk_end = chunks[chunk_id]
+            span = PerformanceCalculator.cpu_bound_task(chunk_start, chunk_end, chunk_id, result_sink, control,
+                                                        workload, workload_options)
+            if span is not None:
+                spans[chunk_id * SPAN_FIELDS:(chunk_id + 1) * SPAN_FIELDS] = span
+
+    @staticmethod
+    def feed_pool(pool: WorkerPool, chunks: list, max_in_flight: int, result_sink, control=None,
+                  workload="basel", workload_options=None) -> list:
+        """Run the chunks on the pool with at most ``max_in_flight`` submitted at a time; returns their spans.
+
+        Submitting every chunk up front would let each idle pool process take
+        one, so the run would use the whole pool whatever num_workers asked for.
+        """
+        spans = [None] * len(chunks)
+        remaining = iter(enumerate(chunks))
+        in_flight = {}
+
+        def submit_next():
+            claimed = next(remaining, None)
+            if claimed is not None:
+                chunk_id, (chunk_start, chunk_end) = claimed
+                future = pool.executor.submit(PerformanceCalculator.cpu_bound_task, chunk_start, chunk_end, chunk_id,
+                                              result_sink, control, workload, workload_options)
+                in_flight[future] = chunk_id
 
-            for future in futures:
-                result += future.result()
+        for _ in range(max_in_flight):
+            submit_next()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                spans[in_flight.pop(future)] = future.result()
+                submit_next()
+        return spans
 
-        end_time = time.time()
-        end_cpu_time = time.process_time()
-        current, peak_memory = tracemalloc.get_traced_memory()
-        tracemalloc.stop()
+    @staticmethod
+    def join_processes(processes: list, control: Optional[RunControl] = None):
+        """Wait for worker processes; once cancelled, terminate any that ignore the flag"""
+        for proc in processes:
+            while proc.exitcode is None:
+                proc.join(timeout=0.1)
+                if control is not None and control.cancelled():
+                    proc.join(timeout=CANCEL_GRACE)
+                    if proc.is_alive():
+                        proc.terminate()
+                        proc.join()
+
+    @staticmethod
+    def calculate_multiprocessing(i: int, j: int, pool: Optional[WorkerPool] = None,
+                                  transport: str = "shared_memory",
+                                  control: Optional[RunControl] = None,
+                                  num_workers: Optional[int] = None,
+                                  scheduling: str = "guided",
+                                  probes: Optional[Sequence[str]] = None,
+                                  workload: str = "basel",
+                                  workload_options: Optional[dict] = None) -> PerformanceMetrics:
+        """Multiprocessing implementation.
+
+        Uses the long-lived ``pool`` when one is given, otherwise falls back to
+        spawning ``num_workers`` processes for this call only. ``transport`` picks how
+        workers hand back their partial sums (see core.channels). With a pool,
+        at most ``num_workers`` chunks (capped at ``pool.num_workers``) run at once.
+        ``scheduling`` picks how the range is chunked (see core.scheduling); either
+        way, workers that finish early take the next unclaimed chunk.
+        """
+        if pool is not None:
+            num_processes = num_workers or pool.num_workers
+            cores_used = min(num_processes, pool.num_workers)
+        else:
+            num_processes = num_workers or DEFAULT_WORKERS
+            cores_used = num_processes
+
+        # Only non-zero if the pool had to be (re)started for this request. Done before
+        # measurement starts so restarted workers don't inherit tracing.
+        pool_startup_time = pool.health_check() if pool is not None else 0.0
+
+        with Measurement(probes) as measurement:
+            chunks = make_chunks(scheduling, i, j, num_processes)
+
+            with open_channel(transport, len(chunks)) as channel:
+                if pool is not None:
+                    spans = PerformanceCalculator.feed_pool(pool, chunks, cores_used, channel.sink, control,
+                                                            workload, workload_options)
+                else:
+                    # Opening the channel (e.g. the Manager server) is a transport cost and stays in execution_time
+                    spawn_start = measurement.elapsed()
+                    next_chunk = multiprocessing.Value("q", 0)
+                    shared_spans = multiprocessing.Array("q", len(chunks) * SPAN_FIELDS, lock=False)
+                    processes = []
+                    for _ in range(min(num_processes, len(chunks))):
+                        proc = multiprocessing.Process(
+                            target=PerformanceCalculator.drain_chunks,
+                            args=(chunks, next_chunk, channel.sink, shared_spans, control, workload,
+                                  workload_options)
+                        )
+                        processes.append(proc)
+                        proc.start()
+
+                    # Worker processes are up; everything after this is compute
+                    pool_startup_time = measurement.elapsed() - spawn_start
 
-        cpu_percent_end = process.cpu_percent()
-        cpu_utilization = max(cpu_percent_start, cpu_percent_end)
+                    PerformanceCalculator.join_processes(processes, control)
+                    # A pid of 0 marks a chunk no worker got to
+                    spans = [
+                        tuple(shared_spans[c * SPAN_FIELDS:(c + 1) * SPAN_FIELDS]) if shared_spans[c * SPAN_FIELDS] else None
+                        for c in range(len(chunks))
+                    ]
+
+                if control is not None:
+                    control.raise_if_cancelled()
+                result = sum(channel.collect())
+
+        results = measurement.results()
+        if pool is None:
+            # Spawning ran on the same clock; pool_startup_time is reported beside execution_time, not in it
+            results["execution_time"] -= pool_startup_time
 
         return PerformanceMetrics(
             timestamp=datetime.now().isoformat(),
             lower_bound=i,
             upper_bound=j,
-            processing_mode="threading",
-            execution_time=end_time - start_time,
-            cpu_time=end_cpu_time - start_cpu_time,
-            memory_usage=peak_memory / 1024 / 1024,
-            cpu_utilization=cpu_utilization,
+            processing_mode="multiprocessing",
+            workload=workload,
             result_value=result,
-            cores_used=num_threads
+            cores_used=cores_used,
+            pool_startup_time=pool_startup_time,
+            transport=transport,
+            scheduling=scheduling,
+            chunks=PerformanceCalculator.chunk_records(chunks, spans, measurement.start_time),
+            **results
         )
 
     @staticmethod
-    def cpu_bound_task(start, end, result_list):
-        partial = 0.0
-        for k in range(start, end + 1):
-            partial += 1.0 / (k * k)
-        result_list.append(partial)
+    def calculate_vectorized(i: int, j: int, control: Optional[RunControl] = None,
+                             probes: Optional[Sequence[str]] = None, workload: str = "basel",
+                             workload_options: Optional[dict] = None) -> PerformanceMetrics:
+        """NumPy vectorized implementation, summed in fixed-size blocks"""
+        with Measurement(probes) as measurement:
+            result = PerformanceCalculator.calculate_chunk_vectorized(i, j, control=control, workload=workload,
+                                                                      workload_options=workload_options)
+            if control is not None:
+                control.raise_if_cancelled()
+
+        return PerformanceMetrics(
+            timestamp=datetime.now().isoformat(),
+            lower_bound=i,
+            upper_bound=j,
+            processing_mode="vectorized",
+            workload=workload,
+            result_value=result,
+            cores_used=1,
+            **measurement.results()
+        )
 
     @staticmethod
-    def calculate_multiprocessing(i: int, j: int) -> PerformanceMetrics:
-        """Multiprocessing implementation (manual process spawning)"""
-        process = psutil.Process()
-        num_processes = min(os.cpu_count(), 8)
-
-        tracemalloc.start()
-        start_time = time.time()
-        start_cpu_time = time.process_time()
-        cpu_percent_start = process.cpu_percent()
-
-        total_range = j - i + 1
-        chunk_size = max(1, total_range // num_processes)
-
-        with multiprocessing.Manager() as manager:
-            result_list = manager.list()
-            processes = []
-
-            for p in range(num_processes):
-                chunk_start = i + p * chunk_size
-                chunk_end = min(chunk_start + chunk_size - 1, j)
-                if chunk_start <= j:
-                    proc = multiprocessing.Process(
-                        target=PerformanceCalculator.cpu_bound_task,
-                        args=(chunk_start, chunk_end, result_list)
-                    )
-                    processes.append(proc)
-                    proc.start()
-
-            for proc in processes:
-                proc.join()
-
-            result = sum(result_list)
-
-        end_time = time.time()
-        end_cpu_time = time.process_time()
-        current, peak_memory = tracemalloc.get_traced_memory()
-        tracemalloc.stop()
-
-        cpu_percent_end = process.cpu_percent()
-        cpu_utilization = max(cpu_percent_start, cpu_percent_end)
+    def calculate_analytic(i: int, j: int, tolerance: float = 1e-15,
+                           probes: Optional[Sequence[str]] = None) -> PerformanceMetrics:
+        """Closed-form implementation via trigamma tail expansions (see core.analytic)"""
+        with Measurement(probes) as measurement:
+            result, estimated_error = basel_range_sum(i, j, tolerance)
 
         return PerformanceMetrics(
             timestamp=datetime.now().isoformat(),
             lower_bound=i,
             upper_bound=j,
-            processing_mode="multiprocessing",
-            execution_time=end_time - start_time,
-            cpu_time=end_cpu_time - start_cpu_time,
-            memory_usage=peak_memory / 1024 / 1024,
-            cpu_utilization=cpu_utilization,
+            processing_mode="analytic",
+            result_value=result,
+            cores_used=1,
+            estimated_error=estimated_error,
+            **measurement.results()
+        )
+
+    @staticmethod
+    def calculate_prefix_sum(i: int, j: int, index: PrefixSumIndex,
+                             probes: Optional[Sequence[str]] = None) -> PerformanceMetrics:
+        """Prefix-sum cache implementation: two checkpoint lookups plus a short fix-up"""
+        with Measurement(probes) as measurement:
+            result, cache_hits, terms_computed = index.range_sum(i, j)
+
+        return PerformanceMetrics(
+            timestamp=datetime.now().isoformat(),
+            lower_bound=i,
+            upper_bound=j,
+            processing_mode="prefix_sum",
             result_value=result,
-            cores_used=num_processes
+            cores_used=1,
+            cache_hits=cache_hits,
+            terms_computed=terms_computed,
+            **measurement.results()
         )
@@ -0,0 +1,126 @@
+import os
+import threading
+
+import numpy as np
+
+PREFIX_CACHE_PATH = os.environ.get("PREFIX_CACHE_PATH", "./prefix_sums.f64")
+# Terms between checkpoints; a range sum needs at most this many terms of fix-up work
+PREFIX_CACHE_INTERVAL = int(os.environ.get("PREFIX_CACHE_INTERVAL", 4096))
+# Beyond this upper bound ranges are summed directly instead of growing the file
+PREFIX_CACHE_MAX_TERMS = int(os.environ.get("PREFIX_CACHE_MAX_TERMS", 1_000_000_000))
+# Checkpoints computed per NumPy batch while growing (256 x 4096 terms = 8 MB)
+GROW_BATCH = 256
+
+
+def _two_sum(a: float, b: float):
+    """a + b as an unevaluated (sum, rounding error) pair"""
+    total = a + b
+    b_virtual = total - a
+    return total, (a - (total - b_virtual)) + (b - b_virtual)
+
+
+def _term_sum(start: int, end: int) -> float:
+    if end < start:
+        return 0.0
+    k = np.arange(start, end + 1, dtype=np.float64)
+    np.multiply(k, k, out=k)
+    np.reciprocal(k, out=k)
+    return float(k.sum())
+
+
+class PrefixSumIndex:
+    """Checkpointed prefix sums of 1/k**2 stored in a memory-mapped float64 file.
+
+    The file holds ``interval`` followed by ``(hi, lo)`` pairs where ``hi + lo``
+    is the sum of the first ``m * interval`` terms. Keeping the rounding error in
+    ``lo`` means the difference of two nearby checkpoints stays accurate even
+    deep into the series. The file is built lazily and extended whenever a range
+    reaches past the last checkpoint, so it survives restarts and each term is
+    only ever paid for once.
+    """
+
+    def __init__(self, path: str = PREFIX_CACHE_PATH, interval: int = PREFIX_CACHE_INTERVAL,
+                 max_terms: int = PREFIX_CACHE_MAX_TERMS):
+        self.path = path
+        self.interval = interval
+        self.max_terms = max_terms
+        self._lock = threading.Lock()
+        self._checkpoints = None
+        self._open()
+
+    def _open(self):
+        size = os.path.getsize(self.path) // 8 if os.path.exists(self.path) else 0
+        header = np.fromfile(self.path, dtype=np.float64, count=1) if size >= 3 else None
+
+        if header is None or header[0] != self.interval:
+            # Missing, empty or built with another interval: start over
+            np.array([self.interval, 0.0, 0.0], dtype=np.float64).tofile(self.path)
+        else:
+            # Drop any partially written trailing checkpoint
+            os.truncate(self.path, (1 + (size - 1) // 2 * 2) * 8)
+        self._map()
+
+    def _map(self):
+        self._checkpoints = np.memmap(self.path, dtype=np.float64, mode="r", offset=8).reshape(-1, 2)
+
+    @property
+    def built_checkpoints(self) -> int:
+        return len(self._checkpoints)
+
+    def _grow(self, checkpoint: int) -> int:
+        """Extend the file up to (at least) ``checkpoint``; returns the number of terms computed"""
+        have = self.built_checkpoints
+        if checkpoint < have:
+            return 0
+
+        target = (checkpoint // GROW_BATCH + 1) * GROW_BATCH
+        hi, lo = (float(value) for value in self._checkpoints[-1])
+        terms = 0
+        with open(self.path, "ab") as f:
+            for batch_start in range(have, target, GROW_BATCH):
+                batch_end = min(batch_start + GROW_BATCH, target)
+                k = np.arange((batch_start - 1) * self.interval + 1, (batch_end - 1) * self.interval + 1,
+                              dtype=np.float64)
+                np.multiply(k, k, out=k)
+                np.reciprocal(k, out=k)
+
+                pairs = np.empty((batch_end - batch_start, 2), dtype=np.float64)
+                for m, block_sum in enumerate(k.reshape(-1, self.interval).sum(axis=1)):
+                    hi, error = _two_sum(hi, float(block_sum))
+                    hi, lo = _two_sum(hi, lo + error)
+                    pairs[m] = (hi, lo)
+                pairs.tofile(f)
+                terms += k.size
+        self._map()
+        return terms
+
+    def _prefix(self, n: int):
+        """sum_{k=1..n} 1/k**2 from the nearest checkpoint; returns ((hi, lo), hit, terms computed)"""
+        checkpoint = (n + self.interval // 2) // self.interval
+        hit = checkpoint < self.built_checkpoints
+        terms = self._grow(checkpoint)
+
+        hi, lo = (float(value) for value in self._checkpoints[checkpoint])
+        edge = checkpoint * self.interval
+        if n >= edge:
+            lo += _term_sum(edge + 1, n)
+        else:
+            lo -= _term_sum(n + 1, edge)
+        return (hi, lo), hit, terms + abs(n - edge)
+
+    def range_sum(self, i: int, j: int):
+        """sum_{k=i..j} 1/k**2; returns (value, cache hits, terms actually computed)"""
+        if j - i + 1 <= self.interval or j > self.max_terms:
+            # Short ranges are cheaper to sum outright, huge ones would blow up the file
+            return _term_sum(i, j), 0, j - i + 1
+
+        with self._lock:
+            upper, upper_hit, upper_terms = self._prefix(j)
+            lower, lower_hit, lower_terms = self._prefix(i - 1)
+        # Subtract hi and lo parts separately so the shared leading digits cancel exactly
+        value = (upper[0] - lower[0]) + (upper[1] - lower[1])
+        return value, int(upper_hit) + int(lower_hit), upper_terms + lower_terms
+
+    def close(self):
+        with self._lock:
+            self._checkpoints = None
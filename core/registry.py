@@ -0,0 +1,122 @@
+import threading
+from dataclasses import dataclass, field
+from importlib.metadata import entry_points
+from typing import Callable, Optional
+
+# Entry point group third-party packages use to ship engines
+ENTRY_POINT_GROUP = "performance_calculator.engines"
+
+
+@dataclass
+class Engine:
+    """A registered calculation engine and what it can do.
+
+    ``fn(request, control, context)`` runs one calculation and returns
+    PerformanceMetrics. It has to be a module-level function because
+    process-tier engines are pickled over to a worker process, where
+    ``context`` only carries the per-run fields of the EngineContext.
+    """
+    name: str
+    fn: Callable
+    label: str
+    description: str = ""
+    # "thread" for engines that release the GIL or mostly wait, "process" for ones that hold it
+    tier: str = "thread"
+    # Tier for workloads with no vector kernel, when the engine falls back to their scalar (GIL-holding) one
+    scalar_tier: Optional[str] = None
+    parallel: bool = False
+    cancellable: bool = False
+    # Largest upper - lower the engine accepts; None when its cost doesn't grow with the range
+    max_range: Optional[int] = 10_000_000
+    # Request fields the engine reads, with their defaults
+    options: dict = field(default_factory=dict)
+    # Most workers worth sweeping over given the EngineContext (parallel engines only)
+    worker_limit: Optional[Callable] = None
+    # Workloads the engine can run (see core.workloads); None means all of them
+    workloads: Optional[tuple] = None
+
+    def supports(self, workload: str) -> bool:
+        return self.workloads is None or workload in self.workloads
+
+    def tier_for(self, workload) -> str:
+        """The executor tier to run ``workload`` (a core.workloads.Workload) on"""
+        if self.scalar_tier is not None and workload.vector is None:
+            return self.scalar_tier
+        return self.tier
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "label": self.label,
+            "description": self.description,
+            "tier": self.tier,
+            "scalar_tier": self.scalar_tier,
+            "capabilities": {
+                "parallel": self.parallel,
+                "cancellable": self.cancellable,
+                "max_range": self.max_range,
+                "workloads": self.workloads,
+            },
+            "options": self.options,
+        }
+
+
+@dataclass
+class EngineContext:
+    """What an engine gets besides the request.
+
+    Thread-tier engines see the app's shared resources; process-tier engines
+    get a copy carrying only the picklable per-run fields.
+    """
+    worker_pool: object = None
+    prefix_index: object = None
+    stream_buffers: object = None
+    # Kernel options from the workload's prepare() for this run
+    workload_options: Optional[dict] = None
+
+
+_engines = {}
+_loaded = False
+_load_lock = threading.Lock()
+
+
+def register_engine(name: str, **attributes):
+    """Decorator registering ``fn`` as engine ``name``; see Engine for the attributes"""
+    def decorator(fn):
+        if "description" not in attributes and fn.__doc__:
+            attributes["description"] = fn.__doc__.strip().splitlines()[0]
+        _engines[name] = Engine(name=name, fn=fn, **attributes)
+        return fn
+    return decorator
+
+
+def load_engines():
+    """Import the built-in engines and any installed through entry points, once per process"""
+    global _loaded
+    if _loaded:
+        return
+    with _load_lock:
+        if _loaded:
+            return
+        import core.engines  # noqa: F401 (registers the built-ins)
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            try:
+                entry_point.load()
+            except Exception as e:
+                print("Failed to load engine", entry_point.name, e)
+        _loaded = True
+
+
+def get_engine(name: str) -> Engine:
+    """The engine registered as ``name``; raises KeyError for unknown names"""
+    load_engines()
+    return _engines[name]
+
+
+def available_engines() -> list:
+    load_engines()
+    return list(_engines.values())
+
+
+def engine_names() -> list:
+    return [engine.name for engine in available_engines()]
@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import replace
+from datetime import datetime
+from typing import Optional
+
+from core.measurement import DEFAULT_PROBES
+from core.model import CalculationRequest
+from core.registry import get_engine
+from core.workloads import get_workload
+from core.utils import PerformanceMetrics
+
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", 1024))
+# Seconds an entry stays valid; 0 disables expiry
+RESULT_CACHE_TTL = float(os.environ.get("RESULT_CACHE_TTL", 3600))
+# Whether cache hits still get a PerformanceResult row
+RESULT_CACHE_RECORD_HITS = os.environ.get("RESULT_CACHE_RECORD_HITS", "1") == "1"
+
+
+def cache_key(request: CalculationRequest) -> tuple:
+    """Every request field that shapes the cached metrics, timings included, not just the result value"""
+    engine = get_engine(request.processing_mode)
+    workload = get_workload(request.workload)
+    # A hit hands back the stored metrics whole (timings, cores_used, scheduling, chunks), so every option keys it
+    options = tuple(getattr(request, option) for option in {**engine.options, **workload.options})
+    # Probes decide which metrics exist (tracemalloc peak, probe_overhead); order and repeats don't matter
+    probes = tuple(sorted(set(request.probes or DEFAULT_PROBES)))
+    return request.lower_bound, request.upper_bound, request.processing_mode, request.workload, options, probes
+
+
+class ResultCache:
+    """In-process LRU cache of calculation metrics with an optional TTL"""
+
+    def __init__(self, max_entries: int = RESULT_CACHE_SIZE, ttl: float = RESULT_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[PerformanceMetrics]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        return replace(entry[1], timestamp=datetime.now().isoformat(), cached=True)
+
+    def put(self, key: tuple, metrics: PerformanceMetrics):
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), metrics)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,45 @@
+import os
+
+SCHEDULING_POLICIES = ("static", "guided")
+# Smallest chunk the guided policy hands out; keeps per-chunk dispatch cost well under the compute
+GUIDED_MIN_CHUNK = int(os.environ.get("GUIDED_MIN_CHUNK", 16_384))
+
+
+def static_chunks(i: int, j: int, num_workers: int) -> list:
+    """Split [i, j] into at most ``num_workers`` contiguous chunks whose sizes differ by at most one"""
+    total = j - i + 1
+    count = max(1, min(num_workers, total))
+    size, remainder = divmod(total, count)
+    chunks = []
+    start = i
+    for c in range(count):
+        end = start + size - 1 + (1 if c < remainder else 0)
+        chunks.append((start, end))
+        start = end + 1
+    return chunks
+
+
+def guided_chunks(i: int, j: int, num_workers: int, min_chunk: int = GUIDED_MIN_CHUNK) -> list:
+    """Split [i, j] into decreasing chunks for self-scheduling workers.
+
+    Each chunk takes half of an even share of what is left, so early chunks are
+    large (little dispatch overhead) and the tail is fine-grained: a worker that
+    falls behind holds up the run by at most one small chunk instead of a whole
+    static share.
+    """
+    chunks = []
+    start = i
+    while start <= j:
+        remaining = j - start + 1
+        size = min(remaining, max(min_chunk, remaining // (2 * num_workers)))
+        chunks.append((start, start + size - 1))
+        start += size
+    return chunks
+
+
+def make_chunks(policy: str, i: int, j: int, num_workers: int) -> list:
+    if policy == "static":
+        return static_chunks(i, j, num_workers)
+    if policy == "guided":
+        return guided_chunks(i, j, num_workers)
+    raise ValueError(f"Unknown scheduling policy: {policy}")
@@ -0,0 +1,113 @@
+import math
+import statistics
+from typing import Iterable, Optional
+
+# Log-scale histogram resolution: bins per doubling, so a bin's midpoint is within ~4.5% of any value in it
+HISTOGRAM_BINS_PER_OCTAVE = 8
+# Bin for zero and negative values, below anything a timer can report
+HISTOGRAM_ZERO_BIN = -10_000
+
+
+def percentile(values: list, pct: float) -> float:
+    """Linearly interpolated percentile of an already sorted, non-empty list"""
+    position = (len(values) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def histogram_bin(value: float) -> int:
+    """Log-scale histogram bin of a positive value"""
+    if value <= 0:
+        return HISTOGRAM_ZERO_BIN
+    return math.floor(math.log2(value) * HISTOGRAM_BINS_PER_OCTAVE)
+
+
+def histogram_percentile(bins: dict, pct: float) -> Optional[float]:
+    """Nearest-rank percentile of a {bin: count} histogram, as the geometric midpoint of its bin"""
+    total = sum(bins.values())
+    if not total:
+        return None
+    rank = max(1, math.ceil(total * pct / 100))
+    seen = 0
+    for index in sorted(bins):
+        seen += bins[index]
+        if seen >= rank:
+            break
+    if index == HISTOGRAM_ZERO_BIN:
+        return 0.0
+    return 2 ** ((index + 0.5) / HISTOGRAM_BINS_PER_OCTAVE)
+
+
+def summarize(samples: Iterable[float]) -> dict:
+    values = sorted(samples)
+    if not values:
+        return {}
+    return {
+        "min": values[0],
+        "median": statistics.median(values),
+        "mean": statistics.fmean(values),
+        "p95": percentile(values, 95),
+        "max": values[-1],
+        "stddev": statistics.stdev(values) if len(values) > 1 else 0.0,
+    }
+
+
+def fit_amdahl(points: list) -> Optional[float]:
+    """Least-squares serial fraction s for speedup = 1 / (s + (1 - s) / n), from (n, speedup) pairs"""
+    # 1/speedup - 1/n = s * (1 - 1/n) is linear in s
+    pairs = [(1 - 1 / n, 1 / speedup - 1 / n) for n, speedup in points if n > 1 and speedup > 0]
+    denominator = sum(x * x for x, _ in pairs)
+    if not denominator:
+        return None
+    return min(1.0, max(0.0, sum(x * y for x, y in pairs) / denominator))
+
+
+def fit_gustafson(points: list) -> Optional[float]:
+    """Least-squares serial fraction s for scaled speedup = n - s * (n - 1), from (n, speedup) pairs.
+
+    Gustafson's law describes weak scaling, so the pairs must come from runs
+    whose problem size grew with n (see SweepRequest.weak_scaling); fitted
+    to fixed-size runs the fraction means nothing.
+    """
+    pairs = [(n - 1, n - speedup) for n, speedup in points if n > 1]
+    denominator = sum(x * x for x, _ in pairs)
+    if not denominator:
+        return None
+    return min(1.0, max(0.0, sum(x * y for x, y in pairs) / denominator))
+
+
+def summarize_workers(chunks: list) -> Optional[dict]:
+    """Per-worker totals from chunk records (see PerformanceCalculator.chunk_records), plus load imbalance"""
+    if not chunks:
+        return None
+
+    workers = {}
+    for chunk in chunks:
+        worker = workers.setdefault((chunk["pid"], chunk["thread_id"]), {
+            "pid": chunk["pid"],
+            "thread_id": chunk["thread_id"],
+            "chunks": 0,
+            "terms": 0,
+            "busy_time": 0.0,
+            "cpu_time": 0.0,
+            "first_start": chunk["start"],
+            "last_end": chunk["end"],
+        })
+        worker["chunks"] += 1
+        worker["terms"] += chunk["upper_bound"] - chunk["lower_bound"] + 1
+        worker["busy_time"] += chunk["end"] - chunk["start"]
+        worker["cpu_time"] += chunk["cpu_time"]
+        worker["first_start"] = min(worker["first_start"], chunk["start"])
+        worker["last_end"] = max(worker["last_end"], chunk["end"])
+
+    busy = [worker["busy_time"] for worker in workers.values()]
+    mean_busy = statistics.fmean(busy)
+    return {
+        "workers": sorted(workers.values(), key=lambda worker: worker["first_start"]),
+        # Slowest worker's busy time relative to the average; 1.0 is perfectly balanced
+        "imbalance": max(busy) / mean_busy if mean_busy > 0 else None,
+        # Time until the first chunk started, and between the first and last worker finishing
+        "startup_latency": min(worker["first_start"] for worker in workers.values()),
+        "finish_spread": max(w["last_end"] for w in workers.values()) - min(w["last_end"] for w in workers.values()),
+    }
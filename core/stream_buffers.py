@@ -0,0 +1,169 @@
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Bytes streamed per run when a request doesn't pick a working set (two float64 arrays together)
+STREAM_WORKING_SET = int(os.environ.get("STREAM_WORKING_SET", 32 * 1024 * 1024))
+# Total bytes of working sets kept alive, and so also the largest one a request can ask for
+STREAM_BUFFER_LIMIT = int(os.environ.get("STREAM_BUFFER_LIMIT", 4 * 1024 ** 3))
+# Where POSIX shared memory lives; segments are files here, so it's also how other processes see an unlink
+SHM_DIR = "/dev/shm"
+# Space left free in SHM_DIR for everything else that uses it (result channels, other programs)
+SHM_HEADROOM = int(os.environ.get("SHM_HEADROOM", 256 * 1024 * 1024))
+# Working sets a worker process keeps attached
+ATTACH_CACHE_SIZE = 4
+# float64 elements of each array one stream term reads (1 KiB of traffic per term)
+ELEMENTS_PER_TERM = 64
+
+
+class WorkingSetUnavailable(Exception):
+    """Raised when a working set can't be created without going over the limit or filling shared memory"""
+
+
+class StreamBuffers:
+    """Shared memory working sets for the stream workload, one per requested size.
+
+    Each segment holds two float64 arrays (b and c) back to back. They're
+    filled once when a size is first requested and then shared by every
+    engine: worker processes attach by segment name (see ``attach``) instead
+    of building their own copy, so the working set is the same physical
+    memory whichever engine streams over it.
+
+    ``acquire`` leases a segment to one run and ``release`` ends the lease;
+    only segments no run holds are unlinked to stay under ``limit``, so a
+    queued run never finds its segment gone. When the leased segments leave
+    no room, or SHM_DIR is short of space, new working sets are refused
+    instead of overcommitting tmpfs (touching an overcommitted page is a
+    SIGBUS, not an error).
+    """
+
+    def __init__(self, limit: int = STREAM_BUFFER_LIMIT):
+        self.limit = limit
+        self._segments = OrderedDict()  # working set bytes -> SharedMemory
+        self._leases = {}  # working set bytes -> runs holding it
+        self._lock = threading.Lock()
+
+    def acquire(self, working_set: int) -> dict:
+        """Workload options pointing at a filled segment of ``working_set`` bytes, leased until ``release``"""
+        elements = max(1, working_set // (16 * ELEMENTS_PER_TERM)) * ELEMENTS_PER_TERM
+        size = elements * 16
+        with self._lock:
+            segment = self._segments.get(working_set)
+            if segment is None:
+                if size > self.limit:
+                    raise WorkingSetUnavailable(f"Working set is larger than the {self.limit:,} byte limit")
+                self._evict(room=size)
+                if self._bytes() + size > self.limit:
+                    raise WorkingSetUnavailable("Working sets in use leave no room for another; try again later")
+                if os.path.isdir(SHM_DIR) and shutil.disk_usage(SHM_DIR).free < size + SHM_HEADROOM:
+                    raise WorkingSetUnavailable(f"Not enough free space in {SHM_DIR} for the working set")
+                segment = shared_memory.SharedMemory(create=True, size=size)
+                arrays = np.ndarray((2, elements), dtype=np.float64, buffer=segment.buf)
+                index = np.arange(elements, dtype=np.float64)
+                np.mod(index, 1024, out=arrays[0])
+                np.multiply(index, 7, out=arrays[1])
+                np.mod(arrays[1], 1024, out=arrays[1])
+                arrays /= 1024
+                del arrays, index
+                self._segments[working_set] = segment
+            self._segments.move_to_end(working_set)
+            self._leases[working_set] = self._leases.get(working_set, 0) + 1
+            return {"segment": segment.name, "elements": elements}
+
+    def release(self, segment_name: str):
+        """End one lease on the segment ``acquire`` returned as ``segment``"""
+        with self._lock:
+            working_set = next(size for size, segment in self._segments.items() if segment.name == segment_name)
+            self._leases[working_set] -= 1
+            if not self._leases[working_set]:
+                del self._leases[working_set]
+
+    def _bytes(self) -> int:
+        return sum(segment.size for segment in self._segments.values())
+
+    def _evict(self, room: int):
+        # Least recently used first; workers drop their mappings once they see the unlink (see prune_attachments)
+        for size in [size for size in self._segments if size not in self._leases]:
+            if self._bytes() + room <= self.limit:
+                return
+            segment = self._segments.pop(size)
+            segment.close()
+            segment.unlink()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "working_sets": list(self._segments),
+                "leased": dict(self._leases),
+                "bytes": self._bytes(),
+                "limit": self.limit,
+            }
+
+    def close(self):
+        with self._lock:
+            for segment in self._segments.values():
+                segment.close()
+                segment.unlink()
+            self._segments.clear()
+            self._leases.clear()
+
+
+_attached = OrderedDict()  # segment name -> this process's views of it
+_attach_lock = threading.Lock()
+
+
+def attach(segment: str, elements: int) -> dict:
+    """This process's views of a StreamBuffers segment, attached on first use.
+
+    "b" and "c" are the NumPy arrays; "b_values" and "c_values" are flat
+    memoryviews of the same memory for the pure-Python kernel.
+    """
+    prune_attachments()
+    with _attach_lock:
+        views = _attached.get(segment)
+        if views is None:
+            shm = shared_memory.SharedMemory(name=segment)
+            arrays = np.ndarray((2, elements), dtype=np.float64, buffer=shm.buf)
+            values = shm.buf.cast("d")
+            views = {
+                "shm": shm,
+                "values": values,
+                "b": arrays[0],
+                "c": arrays[1],
+                "b_values": values[:elements],
+                "c_values": values[elements:2 * elements],
+            }
+            _attached[segment] = views
+            while len(_attached) > ATTACH_CACHE_SIZE:
+                _, stale = _attached.popitem(last=False)
+                _detach(stale)
+        _attached.move_to_end(segment)
+        return views
+
+
+def prune_attachments():
+    """Detach cached segments that StreamBuffers has since unlinked, so their memory goes back to the system.
+
+    Engines call this at the start of every chunk, so a worker doesn't keep
+    evicted working sets mapped until its cache happens to turn over.
+    """
+    if not _attached or not os.path.isdir(SHM_DIR):
+        return
+    with _attach_lock:
+        for name in [name for name in _attached if not os.path.exists(os.path.join(SHM_DIR, name))]:
+            _detach(_attached.pop(name))
+
+
+def _detach(views: dict):
+    shm = views.pop("shm")
+    for name in ("b_values", "c_values", "values"):
+        views.pop(name).release()
+    views.clear()
+    try:
+        shm.close()
+    except BufferError:
+        pass  # A run in another thread still holds an array view; the mapping goes when it's dropped
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 
 from pydantic import BaseModel
 
@@ -10,11 +11,46 @@ class PerformanceMetrics:
     upper_bound: int
     processing_mode: str
     execution_time: float
-    cpu_time: float
-    memory_usage: float
-    cpu_utilization: float
-    result_value: float
+    cpu_time: Optional[float]
+    # MB: tracemalloc peak when that probe ran, else peak process-tree RSS growth
+    memory_usage: Optional[float]
+    cpu_utilization: Optional[float]
+    result_value: Optional[float]  # None when the run was cancelled
     cores_used: int = 1
+    # Kernel summed over the range (see core.workloads)
+    workload: str = "basel"
+    # Memory-bound workloads: bytes in the working set, and bytes read per second in GB/s
+    working_set: Optional[int] = None
+    bandwidth: Optional[float] = None
+    # Seconds spent starting worker processes; kept out of execution_time, so wall time is the sum of the two
+    pool_startup_time: float = 0.0
+    # How multiprocessing workers returned partial sums ("manager" or "shared_memory")
+    transport: Optional[str] = None
+    # Parallel engines: "static" or "guided" chunking (see core.scheduling)
+    scheduling: Optional[str] = None
+    # Upper bound on |result_value - exact sum| for engines that approximate it
+    estimated_error: Optional[float] = None
+    # Prefix-sum cache: checkpoint lookups served from the index, and terms actually summed
+    cache_hits: Optional[int] = None
+    terms_computed: Optional[int] = None
+    # True when served from the result cache instead of being recomputed
+    cached: bool = False
+    # "completed" or "cancelled"
+    status: str = "completed"
+    # Shared by every row produced by one comparison / sweep request
+    run_group: Optional[str] = None
+    # Repeated runs: every trial (warmups included) and min/median/mean/p95/stddev of the measured ones
+    trials: Optional[list] = None
+    trial_stats: Optional[dict] = None
+    # Measurement probes that were active (see core.measurement), peak process-tree RSS in MB,
+    # and seconds each probe spent measuring
+    peak_rss: Optional[float] = None
+    probes: Optional[list] = None
+    probe_overhead: Optional[dict] = None
+    # CPU probe: per-core and process-tree utilization series with their averages and peaks
+    cpu_profile: Optional[dict] = None
+    # Parallel engines: one record per chunk (bounds, pid/thread id, start/end since run start, CPU time)
+    chunks: Optional[list] = None
 
 
 class CalculationResponse(BaseModel):
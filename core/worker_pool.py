@@ -0,0 +1,83 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker
+
+POOL_WORKERS = int(os.environ.get("POOL_WORKERS", min(os.cpu_count(), 8)))
+# Seconds between background health checks of the pool
+POOL_HEALTH_INTERVAL = float(os.environ.get("POOL_HEALTH_INTERVAL", 10))
+
+
+def _ping(value: int) -> int:
+    return value
+
+
+class WorkerPool:
+    """Long-lived process pool shared by every multiprocessing calculation.
+
+    Worker processes are spawned once (see ``start``) and reused across
+    requests. If a worker dies the executor becomes broken; ``health_check``
+    notices that and replaces the whole pool.
+    """
+
+    def __init__(self, num_workers: int = POOL_WORKERS):
+        self.num_workers = num_workers
+        self.startup_time = 0.0
+        self.restarts = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def start(self) -> float:
+        with self._lock:
+            return self._start()
+
+    def _start(self) -> float:
+        start_time = time.perf_counter()
+        # Workers must share our resource tracker; otherwise each one starts its own and
+        # "cleans up" shared memory segments it attached to when it exits.
+        resource_tracker.ensure_running()
+        self._executor = ProcessPoolExecutor(max_workers=self.num_workers)
+        # Workers are spawned on demand, so push one task per worker to bring them all up now
+        list(self._executor.map(_ping, range(self.num_workers)))
+        self.startup_time = time.perf_counter() - start_time
+        return self.startup_time
+
+    def _is_healthy(self) -> bool:
+        try:
+            # submit() fails straight away once a worker has died, without waiting on busy workers
+            self._executor.submit(_ping, 0)
+        except (BrokenProcessPool, RuntimeError):
+            return False
+        return True
+
+    def health_check(self) -> float:
+        """Make sure the pool is usable; returns the startup cost paid, 0.0 if it was healthy"""
+        with self._lock:
+            if self._executor is None:
+                return self._start()
+            if self._is_healthy():
+                return 0.0
+
+            print("Worker pool is broken, restarting it")
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self.restarts += 1
+            return self._start()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        return self._executor
+
+    def stats(self) -> dict:
+        return {
+            "num_workers": self.num_workers,
+            "startup_time": self.startup_time,
+            "restarts": self.restarts,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
@@ -0,0 +1,253 @@
+import os
+import zlib
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import compress
+from math import isqrt
+from typing import Callable, Optional
+
+import numpy as np
+
+from core.stream_buffers import attach, STREAM_WORKING_SET, ELEMENTS_PER_TERM
+
+# Matrix multiply: each term is one row of an N x N product
+MATMUL_SIZE = int(os.environ.get("MATMUL_SIZE", 16))
+
+
+@dataclass
+class Workload:
+    """A kernel summed over a range of terms.
+
+    ``scalar(start, end, **options)`` is the pure-Python version and
+    ``vector(start, end, **options)`` the NumPy one (engines fall back to scalar
+    when it's None). Both return a float that is additive over adjacent
+    ranges, so any engine can split the range into chunks and sum the partial
+    results. ``prepare(request, context)``, if set, runs in the app before each
+    calculation and returns the kernel ``options``; they must be picklable.
+    ``release(options, context)``, if set, runs once the calculation is over.
+    """
+    name: str
+    label: str
+    kind: str  # "cpu", "memory" or "allocation": what bounds it
+    scalar: Callable
+    vector: Optional[Callable] = None
+    description: str = ""
+    # Largest upper bound the kernel handles (e.g. the prime sieve's square root table)
+    max_upper_bound: Optional[int] = None
+    # Fewest terms per block worth a kernel call ending at a given term, for kernels with a per-call setup cost
+    min_block: Optional[Callable] = None
+    prepare: Optional[Callable] = None
+    release: Optional[Callable] = None
+    # Request fields the workload reads, with their defaults
+    options: dict = field(default_factory=dict)
+    # Memory traffic per term, for workloads whose throughput is reported in GB/s
+    bytes_per_term: Optional[int] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "label": self.label,
+            "kind": self.kind,
+            "description": self.description,
+            "vectorized": self.vector is not None,
+            "max_upper_bound": self.max_upper_bound,
+            "options": self.options,
+            "bytes_per_term": self.bytes_per_term,
+        }
+
+
+WORKLOADS = {}
+
+
+def register_workload(workload: Workload) -> Workload:
+    WORKLOADS[workload.name] = workload
+    return workload
+
+
+def get_workload(name: str) -> Workload:
+    """The workload registered as ``name``; raises KeyError for unknown names"""
+    return WORKLOADS[name]
+
+
+def basel_sum(start: int, end: int) -> float:
+    result = 0.0
+    for k in range(start, end + 1):
+        result += 1.0 / (k * k)
+    return result
+
+
+def basel_sum_vectorized(start: int, end: int) -> float:
+    k = np.arange(start, end + 1, dtype=np.float64)
+    # In-place ops so each block only ever allocates one array
+    np.multiply(k, k, out=k)
+    np.reciprocal(k, out=k)
+    return float(k.sum())
+
+
+def harmonic_sum(start: int, end: int) -> float:
+    result = 0.0
+    for k in range(start, end + 1):
+        result += 1.0 / k
+    return result
+
+
+def harmonic_sum_vectorized(start: int, end: int) -> float:
+    k = np.arange(start, end + 1, dtype=np.float64)
+    np.reciprocal(k, out=k)
+    return float(k.sum())
+
+
+@lru_cache(maxsize=8)
+def small_primes(limit: int) -> tuple:
+    """Primes <= limit by a plain sieve; the base primes of a segmented sieve"""
+    if limit < 2:
+        return ()
+    sieve = bytearray(b"\x01") * (limit + 1)
+    sieve[0] = sieve[1] = 0
+    for p in range(2, isqrt(limit) + 1):
+        if sieve[p]:
+            sieve[p * p::p] = bytes(len(range(p * p, limit + 1, p)))
+    return tuple(compress(range(limit + 1), sieve))
+
+
+def base_primes(end: int) -> tuple:
+    """Primes <= isqrt(end), cut from a sieve rounded up to a power of two.
+
+    Every block and chunk has its own ``end``; rounding lets all of a run's
+    blocks share one cached sieve instead of rebuilding it per block.
+    """
+    limit = isqrt(end)
+    primes = small_primes(1 << limit.bit_length())
+    return primes[:bisect_right(primes, limit)]
+
+
+def prime_count(start: int, end: int) -> float:
+    """Number of primes in [start, end] by a segmented sieve"""
+    low = max(start, 2)
+    if end < low:
+        return 0.0
+    segment = bytearray(b"\x01") * (end - low + 1)
+    for p in base_primes(end):
+        first = max(p * p, (low + p - 1) // p * p)
+        if first <= end:
+            segment[first - low::p] = bytes(len(range(first, end + 1, p)))
+    return float(segment.count(1))
+
+
+def prime_count_vectorized(start: int, end: int) -> float:
+    low = max(start, 2)
+    if end < low:
+        return 0.0
+    segment = np.ones(end - low + 1, dtype=np.bool_)
+    for p in base_primes(end):
+        first = max(p * p, (low + p - 1) // p * p)
+        segment[first - low::p] = False
+    return float(np.count_nonzero(segment))
+
+
+@lru_cache(maxsize=None)
+def matmul_rhs(size: int = MATMUL_SIZE) -> tuple:
+    """The fixed right-hand matrix every row is multiplied by"""
+    return tuple(tuple(((t * 17 + c * 5) % 103) / 103 for c in range(size)) for t in range(size))
+
+
+def matmul_sum(start: int, end: int) -> float:
+    """Sum of the rows start..end of A @ B, where row k of A is derived from k"""
+    rhs = matmul_rhs()
+    size = len(rhs)
+    result = 0.0
+    for k in range(start, end + 1):
+        seed = k % 101
+        row = [((seed * 7 + t * 13) % 101) / 101 for t in range(size)]
+        for c in range(size):
+            cell = 0.0
+            for t in range(size):
+                cell += row[t] * rhs[t][c]
+            result += cell
+    return result
+
+
+def matmul_sum_vectorized(start: int, end: int) -> float:
+    rhs = np.array(matmul_rhs())
+    seeds = np.arange(start, end + 1, dtype=np.int64) % 101
+    lhs = ((seeds[:, None] * 7 + np.arange(len(rhs)) * 13) % 101) / 101
+    return float((lhs @ rhs).sum())
+
+
+def string_hash_sum(start: int, end: int) -> float:
+    """CRC32 of a freshly built string per term, scaled to [0, 1); dominated by allocation"""
+    total = 0
+    for k in range(start, end + 1):
+        total += zlib.crc32(f"item-{k}".encode())
+    return total / 2 ** 32
+
+
+def prepare_stream(request, context) -> dict:
+    """Kernel options for the stream workload: a shared working set of the requested size, leased to this run"""
+    return context.stream_buffers.acquire(request.working_set or STREAM_WORKING_SET)
+
+
+def release_stream(options: dict, context):
+    context.stream_buffers.release(options["segment"])
+
+
+def stream_sum(start: int, end: int, segment: str, elements: int) -> float:
+    """STREAM-style triad sum of b[i] + 3 c[i], ELEMENTS_PER_TERM consecutive elements per term.
+
+    Term k covers row k mod rows of the working set, so a range longer than
+    the working set wraps around and streams over it again.
+    """
+    views = attach(segment, elements)
+    b, c = views["b_values"], views["c_values"]
+    rows = elements // ELEMENTS_PER_TERM
+    result = 0.0
+    for k in range(start, end + 1):
+        i = k % rows * ELEMENTS_PER_TERM
+        result += sum(b[i:i + ELEMENTS_PER_TERM]) + 3.0 * sum(c[i:i + ELEMENTS_PER_TERM])
+    return result
+
+
+def stream_sum_vectorized(start: int, end: int, segment: str, elements: int) -> float:
+    views = attach(segment, elements)
+    b, c = views["b"], views["c"]
+    rows = elements // ELEMENTS_PER_TERM
+    result = 0.0
+    position = start
+    while position <= end:
+        row = position % rows
+        count = min(end - position + 1, rows - row)
+        i, n = row * ELEMENTS_PER_TERM, count * ELEMENTS_PER_TERM
+        result += float(b[i:i + n].sum()) + 3.0 * float(c[i:i + n].sum())
+        position += count
+    return result
+
+
+register_workload(Workload(
+    "basel", "Basel series (1/k²)", "cpu", basel_sum, basel_sum_vectorized,
+    description="Float division per term; converges to π²/6"
+))
+register_workload(Workload(
+    "harmonic", "Harmonic series (1/k)", "cpu", harmonic_sum, harmonic_sum_vectorized,
+    description="Float division per term; grows like ln(j/i)"
+))
+register_workload(Workload(
+    "primes", "Prime counting (segmented sieve)", "memory", prime_count, prime_count_vectorized,
+    description="Counts primes in the range with strided writes to a sieve segment",
+    # Each call walks every base prime, so a segment shorter than their range mostly measures that walk
+    max_upper_bound=10 ** 12, min_block=isqrt
+))
+register_workload(Workload(
+    "matmul", f"Matrix multiply ({MATMUL_SIZE}x{MATMUL_SIZE})", "cpu", matmul_sum, matmul_sum_vectorized,
+    description="One row of a dense matrix product per term; BLAS-backed when vectorized"
+))
+register_workload(Workload(
+    "string_hash", "String hashing (CRC32)", "allocation", string_hash_sum,
+    description="Builds and hashes a small string per term; no vectorized form"
+))
+register_workload(Workload(
+    "stream", "Memory stream (triad)", "memory", stream_sum, stream_sum_vectorized,
+    description="Reads two float64 arrays in shared memory sequentially; the working_set option sets their size",
+    prepare=prepare_stream, release=release_stream, options={"working_set": STREAM_WORKING_SET},
+    bytes_per_term=16 * ELEMENTS_PER_TERM
+))